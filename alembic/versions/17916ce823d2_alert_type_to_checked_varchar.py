@@ -0,0 +1,40 @@
+"""store alerts.type as checked varchar instead of the alerttype enum
+
+Revision ID: 17916ce823d2
+Revises: b652d1a63b44
+Create Date: 2026-10-16 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '17916ce823d2'
+down_revision = 'b652d1a63b44'
+branch_labels = None
+depends_on = None
+
+ALERT_TYPES = ('geofence', 'anomaly', 'panic', 'sos', 'sequence', 'manual')
+
+
+def upgrade() -> None:
+    # Enum labels were the uppercase member names; the column now stores the
+    # lowercase AlertType values, guarded by a CHECK instead of a PG enum.
+    op.execute("ALTER TABLE alerts ALTER COLUMN type TYPE varchar(16) USING lower(type::text)")
+    op.create_check_constraint(
+        "ck_alerts_type",
+        "alerts",
+        "type IN (" + ", ".join(f"'{t}'" for t in ALERT_TYPES) + ")"
+    )
+    op.execute("DROP TYPE IF EXISTS alerttype")
+
+
+def downgrade() -> None:
+    op.drop_constraint("ck_alerts_type", "alerts", type_="check")
+    op.execute(
+        "CREATE TYPE alerttype AS ENUM ("
+        + ", ".join(f"'{t.upper()}'" for t in ALERT_TYPES)
+        + ")"
+    )
+    op.execute("ALTER TABLE alerts ALTER COLUMN type TYPE alerttype USING upper(type)::alerttype")
@@ -0,0 +1,30 @@
+"""add (created_at, id) indexes for keyset pagination of user listings
+
+Revision ID: 22e6ac0ca4d2
+Revises: 17916ce823d2
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '22e6ac0ca4d2'
+down_revision = '17916ce823d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # users_unified pages by (created_at, id) DESC; each UNION ALL branch seeks
+    # its own index and the planner merges the two ordered streams.
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tourists_created_id ON tourists (created_at DESC, id DESC)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_authorities_created_id ON authorities (created_at DESC, id DESC)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_authorities_created_id")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_tourists_created_id")
@@ -0,0 +1,48 @@
+"""add unique index on incidents.alert_id for the acknowledge upsert
+
+Revision ID: 351e4a9898ae
+Revises: 4435af233f0f
+Create Date: 2026-10-16 13:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '351e4a9898ae'
+down_revision = '4435af233f0f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # /incident/acknowledge upserts with ON CONFLICT (alert_id), which needs a
+    # unique index to infer the conflict target. Collapse any duplicate
+    # incidents per alert onto the oldest one first (repointing their E-FIRs),
+    # otherwise the unique build fails.
+    op.execute(
+        "UPDATE efirs SET incident_id = d.keep_id "
+        "FROM (SELECT id, min(id) OVER (PARTITION BY alert_id) AS keep_id FROM incidents) d "
+        "WHERE efirs.incident_id = d.id AND d.id <> d.keep_id"
+    )
+    op.execute(
+        "DELETE FROM incidents dup USING incidents keep "
+        "WHERE dup.alert_id = keep.alert_id AND dup.id > keep.id"
+    )
+    
+    # A failed earlier build leaves an INVALID index that IF NOT EXISTS
+    # would keep, so drop it first.
+    with op.get_context().autocommit_block():
+        invalid = op.get_bind().execute(sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = 'ux_incidents_alert_id' AND NOT i.indisvalid"
+        )).first()
+        if invalid:
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ux_incidents_alert_id")
+        op.execute("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_incidents_alert_id ON incidents (alert_id)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ux_incidents_alert_id")
@@ -0,0 +1,35 @@
+"""add partial covering index for active user devices
+
+Revision ID: 37a74c454412
+Revises: c2592105d158
+Create Date: 2026-10-16 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '37a74c454412'
+down_revision = 'c2592105d158'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # "Active devices for user X, most recent first" becomes a single
+    # index-only range scan for push-notification fan-out.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_devices_active_user "
+            "ON user_devices (user_id, last_used DESC) INCLUDE (device_token, device_type) "
+            "WHERE is_active = true"
+        )
+        # Low-selectivity boolean index is superseded by the partial index above
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_user_devices_active")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_devices_active ON user_devices (is_active)")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_user_devices_active_user")
@@ -0,0 +1,32 @@
+"""add index on active tourists' last known location
+
+Revision ID: 4435af233f0f
+Revises: 22e6ac0ca4d2
+Create Date: 2026-10-16 13:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4435af233f0f'
+down_revision = '22e6ac0ca4d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Radius/region broadcasts filter active tourists by a lat/lon bounding box
+    # before the exact distance check; PostGIS is not used (see 3a974320dcc0).
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tourists_active_last_location "
+            "ON tourists (last_location_lat, last_location_lon) "
+            "WHERE is_active = true"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tourists_active_last_location")
@@ -0,0 +1,29 @@
+"""add case-insensitive unique email indexes for login lookups
+
+Revision ID: 4a941087cbe5
+Revises: 37a74c454412
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a941087cbe5'
+down_revision = '37a74c454412'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Login matches on lower(email); expression indexes keep that O(log n).
+    with op.get_context().autocommit_block():
+        op.execute("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_tourists_email_lower ON tourists (lower(email))")
+        op.execute("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_authorities_email_lower ON authorities (lower(email))")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_authorities_email_lower")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tourists_email_lower")
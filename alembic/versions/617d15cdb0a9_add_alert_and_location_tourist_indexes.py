@@ -0,0 +1,32 @@
+"""add tourist-scoped indexes for alert and location lookups
+
+Revision ID: 617d15cdb0a9
+Revises: 4a941087cbe5
+Create Date: 2026-10-16 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '617d15cdb0a9'
+down_revision = '4a941087cbe5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Per-tourist alert history/open-alert lookups and unfiltered location
+    # timelines (idx_location_tourist_time only covers scored rows).
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alerts_tourist_created ON alerts (tourist_id, created_at DESC)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alerts_tourist_resolved ON alerts (tourist_id, is_resolved)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_locations_tourist_ts ON locations (tourist_id, timestamp DESC)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_locations_tourist_ts")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_alerts_tourist_resolved")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_alerts_tourist_created")
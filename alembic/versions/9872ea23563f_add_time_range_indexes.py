@@ -0,0 +1,32 @@
+"""add time-range indexes for admin status and analytics counts
+
+Revision ID: 9872ea23563f
+Revises: b6584e537664
+Create Date: 2026-10-16 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9872ea23563f'
+down_revision = 'b6584e537664'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # "count(*) WHERE <ts> >= cutoff" on the admin dashboard becomes a range scan;
+    # (created_at, type) also serves the alerts-by-type GROUP BY index-only.
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tourists_last_seen ON tourists (last_seen)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alerts_created_type ON alerts (created_at, type)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_locations_timestamp ON locations (timestamp)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_locations_timestamp")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_alerts_created_type")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tourists_last_seen")
@@ -0,0 +1,38 @@
+"""add users_unified view over tourists and authorities
+
+Revision ID: b652d1a63b44
+Revises: 9872ea23563f
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b652d1a63b44'
+down_revision = '9872ea23563f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One relation for admin user listings; the planner merges the two
+    # created_at-ordered branches instead of the client concatenating lists.
+    # ids/emails are cast to text because tourists uses uuid/citext.
+    op.execute("""
+        CREATE OR REPLACE VIEW users_unified AS
+        SELECT id::text AS id, email::text AS email, name, phone, is_active, created_at,
+               'tourist'::text AS kind, safety_score, last_seen,
+               NULL::text AS badge_number, NULL::text AS department, NULL::text AS rank
+          FROM tourists
+        UNION ALL
+        SELECT id, email, name, phone, is_active, created_at,
+               'authority'::text, NULL::integer, NULL::timestamptz,
+               badge_number, department, rank
+          FROM authorities
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW IF EXISTS users_unified")
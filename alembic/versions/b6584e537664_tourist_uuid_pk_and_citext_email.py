@@ -0,0 +1,81 @@
+"""store tourist ids as uuid and emails as citext
+
+Revision ID: b6584e537664
+Revises: 617d15cdb0a9
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6584e537664'
+down_revision = '617d15cdb0a9'
+branch_labels = None
+depends_on = None
+
+
+# Columns holding tourist ids; their foreign keys are looked up by name below
+TOURIST_ID_COLUMNS = [
+    ('trips', 'tourist_id'),
+    ('locations', 'tourist_id'),
+    ('alerts', 'tourist_id'),
+    ('efirs', 'tourist_id'),
+    ('user_devices', 'user_id'),
+    ('broadcast_acknowledgments', 'tourist_id'),
+]
+
+# pg_constraint.confdeltype -> ON DELETE clause
+ON_DELETE = {'a': '', 'r': ' ON DELETE RESTRICT', 'c': ' ON DELETE CASCADE', 'n': ' ON DELETE SET NULL', 'd': ' ON DELETE SET DEFAULT'}
+
+
+def _tourist_foreign_keys():
+    """(constraint, table, column, ON DELETE clause) for every single-column FK to tourists.id"""
+    rows = op.get_bind().execute(sa.text(
+        "SELECT c.conname, c.conrelid::regclass::text, a.attname, c.confdeltype::text "
+        "FROM pg_constraint c "
+        "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1] "
+        "WHERE c.contype = 'f' AND c.confrelid = 'tourists'::regclass"
+    )).all()
+    return [(name, table, column, ON_DELETE[deltype]) for name, table, column, deltype in rows]
+
+
+def _retype_tourist_ids(sql_type: str, cast: str) -> None:
+    # Actual constraint names: a guessed name with IF EXISTS would be skipped
+    # silently and the column retype would then fail on the live FK
+    foreign_keys = _tourist_foreign_keys()
+    columns = list(dict.fromkeys(TOURIST_ID_COLUMNS + [(table, column) for _, table, column, _ in foreign_keys]))
+    
+    for name, table, _, _ in foreign_keys:
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+    op.execute(f"ALTER TABLE tourists ALTER COLUMN id TYPE {sql_type} USING id::{cast}")
+    for table, column in columns:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE {sql_type} USING {column}::{cast}")
+    for name, table, column, on_delete in foreign_keys:
+        op.execute(
+            f'ALTER TABLE {table} ADD CONSTRAINT "{name}" '
+            f"FOREIGN KEY ({column}) REFERENCES tourists (id){on_delete}"
+        )
+
+
+def upgrade() -> None:
+    # Fail fast instead of queueing behind long-running transactions.
+    # Type changes rewrite these tables (and their indexes); run in a maintenance window.
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    
+    # 16-byte uuid instead of 32/36-char text for the PK and every FK to it
+    _retype_tourist_ids("uuid", "uuid")
+    
+    # citext makes the existing unique constraint case-insensitive, so the
+    # separate lower(email) expression index is no longer needed
+    op.execute("CREATE EXTENSION IF NOT EXISTS citext")
+    op.execute("ALTER TABLE tourists ALTER COLUMN email TYPE citext")
+    op.execute("DROP INDEX IF EXISTS idx_tourists_email_lower")
+
+
+def downgrade() -> None:
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.execute("ALTER TABLE tourists ALTER COLUMN email TYPE varchar USING email::text")
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_tourists_email_lower ON tourists (lower(email))")
+    _retype_tourist_ids("varchar", "text")
@@ -0,0 +1,40 @@
+"""add covering index for tourist location timelines
+
+Revision ID: c2592105d158
+Revises: 9f2e3d4a5b6c
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2592105d158'
+down_revision = '9f2e3d4a5b6c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Narrow (tourist_id, timestamp DESC) index carrying safety_score as payload,
+    # so "latest locations for tourist X" is an index-only scan.
+    # It supersedes the wide idx_location_safety_timestamp, which is dropped
+    # once the replacement exists.
+    # CONCURRENTLY cannot run inside a transaction block, hence autocommit_block().
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_location_tourist_time "
+            "ON locations (tourist_id, timestamp DESC) INCLUDE (safety_score) "
+            "WHERE safety_score IS NOT NULL"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_location_safety_timestamp")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_location_safety_timestamp "
+            "ON locations (tourist_id, safety_score, timestamp)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_location_tourist_time")
@@ -0,0 +1,82 @@
+"""expose users_unified.id as uuid so keyset pages sort on the uuid value
+
+Revision ID: dd500be48272
+Revises: fe91c48c17d3
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dd500be48272'
+down_revision = 'fe91c48c17d3'
+branch_labels = None
+depends_on = None
+
+# Copied rather than imported from app.models, so the revision stays frozen
+AUTHORITY_ID_PATTERN = "^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
+
+
+def upgrade() -> None:
+    # id::text sorted by collation and hid ix_tourists_created_id from the
+    # tourist branch, so both branches now yield uuid. authorities.id stays
+    # varchar; refuse to continue if any existing id would not cast, then
+    # pin the rule with a CHECK so no later insert can break the cast.
+    conn = op.get_bind()
+    bad = conn.execute(
+        sa.text("SELECT count(*) FROM authorities WHERE id !~ :pattern"),
+        {"pattern": AUTHORITY_ID_PATTERN},
+    ).scalar()
+    if bad:
+        raise RuntimeError(
+            f"{bad} authorities.id value(s) are not UUIDs; fix them before upgrading"
+        )
+    op.execute(
+        f"ALTER TABLE authorities ADD CONSTRAINT ck_authorities_id_uuid "
+        f"CHECK (id ~ '{AUTHORITY_ID_PATTERN}') NOT VALID"
+    )
+    op.execute("ALTER TABLE authorities VALIDATE CONSTRAINT ck_authorities_id_uuid")
+    
+    # A column type change needs DROP + CREATE
+    op.execute("DROP VIEW IF EXISTS users_unified")
+    op.execute("""
+        CREATE VIEW users_unified AS
+        SELECT id, email::text AS email, name, phone, is_active, created_at,
+               'tourist'::text AS kind, safety_score, last_seen,
+               NULL::text AS badge_number, NULL::text AS department, NULL::text AS rank
+          FROM tourists
+        UNION ALL
+        SELECT id::uuid, email, name, phone, is_active, created_at,
+               'authority'::text, NULL::integer, NULL::timestamptz,
+               badge_number, department, rank
+          FROM authorities
+    """)
+    # The authority branch now sorts on id::uuid; index that expression instead
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_authorities_created_uuid "
+            "ON authorities (created_at DESC, (id::uuid) DESC)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_authorities_created_id")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_authorities_created_id ON authorities (created_at DESC, id DESC)")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_authorities_created_uuid")
+    op.execute("DROP VIEW IF EXISTS users_unified")
+    op.execute("""
+        CREATE VIEW users_unified AS
+        SELECT id::text AS id, email::text AS email, name, phone, is_active, created_at,
+               'tourist'::text AS kind, safety_score, last_seen,
+               NULL::text AS badge_number, NULL::text AS department, NULL::text AS rank
+          FROM tourists
+        UNION ALL
+        SELECT id, email, name, phone, is_active, created_at,
+               'authority'::text, NULL::integer, NULL::timestamptz,
+               badge_number, department, rank
+          FROM authorities
+    """)
+    op.execute("ALTER TABLE authorities DROP CONSTRAINT IF EXISTS ck_authorities_id_uuid")
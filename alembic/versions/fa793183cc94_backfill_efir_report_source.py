@@ -0,0 +1,51 @@
+"""backfill efirs.report_source for authority-filed reports in batches
+
+Revision ID: fa793183cc94
+Revises: dd500be48272
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+import time
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fa793183cc94'
+down_revision = 'dd500be48272'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+_HAS_NULL = sa.text("SELECT 1 FROM efirs WHERE report_source IS NULL LIMIT 1")
+
+_BACKFILL_BATCH = sa.text("""
+    WITH batch AS (
+        SELECT id FROM efirs
+        WHERE report_source IS NULL
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE efirs SET report_source = 'authority'
+    FROM batch
+    WHERE efirs.id = batch.id
+""")
+
+
+def upgrade() -> None:
+    # Authority E-FIRs are inserted without report_source, so NULLs keep
+    # accruing after f555f22c4c4d's one-off UPDATE. Each batch commits on its
+    # own; the loop ends only once no NULL row is left, since a batch whose
+    # rows are all locked by writers updates nothing without being the last.
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        while conn.execute(_HAS_NULL).first() is not None:
+            if conn.execute(_BACKFILL_BATCH, {"batch_size": BATCH_SIZE}).rowcount == 0:
+                time.sleep(0.1)
+
+
+def downgrade() -> None:
+    # Backfilled values are indistinguishable from ones written by the app
+    pass
@@ -0,0 +1,41 @@
+"""add partial index on active tourists' last_seen and leave room for HOT updates
+
+Revision ID: fe91c48c17d3
+Revises: 351e4a9898ae
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fe91c48c17d3'
+down_revision = '351e4a9898ae'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Acknowledge/resolve/close rewrite alerts and incidents rows without
+    # touching indexed columns; free space on each page keeps those updates HOT.
+    # Applies to pages written from now on.
+    op.execute("ALTER TABLE alerts SET (fillfactor = 90)")
+    op.execute("ALTER TABLE incidents SET (fillfactor = 90)")
+    
+    # Heatmap tourist queries filter is_active AND last_seen >= cutoff.
+    # (tourist_id, created_at/timestamp DESC) on alerts/locations exist since 617d15cdb0a9.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tourists_active_lastseen "
+            "ON tourists (last_seen DESC) "
+            "WHERE is_active = true"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_tourists_active_lastseen")
+    
+    op.execute("ALTER TABLE incidents RESET (fillfactor)")
+    op.execute("ALTER TABLE alerts RESET (fillfactor)")
@@ -1,15 +1,78 @@
 """
 Local authentication system for development/testing without Supabase dependency
 """
+import asyncio
 import hashlib
+import os
 import secrets
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-from jose import JWTError, jwt
+import jwt
 import bcrypt as bcrypt_lib
+from cachetools import TLRUCache
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import load_only
 from ..models.database_models import Tourist, Authority
+from ..config import get_settings
+
+# Argon2id (optional, faster at equivalent strength than high-cost bcrypt)
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
+
+settings = get_settings()
+
+# Password hashing is CPU-bound; bcrypt/argon2 release the GIL so a thread
+# pool keeps it off the event loop and spreads it across cores.
+_HASH_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="pwhash")
+
+# Decoded JWT payloads keyed by sha256(token); the same token arrives on every
+# request of a session so this skips the HMAC + JSON decode on repeats.
+# Each entry lives for min(_TOKEN_CACHE_TTL, exp - now) so it never outlives the token.
+_TOKEN_CACHE_TTL = 300
+
+
+def _token_ttu(_key, payload, now):
+    exp = payload.get("exp")
+    if exp is None:
+        return now + _TOKEN_CACHE_TTL
+    return min(now + _TOKEN_CACHE_TTL, exp)
+
+
+_TOKEN_CACHE: TLRUCache = TLRUCache(maxsize=10_000, ttu=_token_ttu, timer=time.time)
+_TOKEN_CACHE_LOCK = threading.Lock()
+
+_bcrypt_checkpw = bcrypt_lib.checkpw
+
+# Login lookups, built once; only the bound email changes per call
+_TOURIST_BY_EMAIL = select(Tourist).options(
+    load_only(Tourist.id, Tourist.email, Tourist.password_hash)
+).where(Tourist.email == bindparam("email"))  # citext: case-insensitive
+
+_AUTHORITY_BY_EMAIL = select(Authority).options(
+    load_only(Authority.id, Authority.email, Authority.password_hash, Authority.rank)
+).where(func.lower(Authority.email) == bindparam("email"))
+
+
+def _uuid7() -> str:
+    """Time-ordered UUIDv7 (canonical form), so new rows land on the rightmost PK btree leaf"""
+    ts_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(secrets.token_bytes(10), 'big')
+    value = (ts_ms & 0xFFFF_FFFF_FFFF) << 80          # 48-bit unix ms timestamp
+    value |= 0x7 << 76                                 # version 7
+    value |= ((rand >> 64) & 0xFFF) << 64              # 12 bits rand_a
+    value |= 0b10 << 62                                # RFC 4122 variant
+    value |= rand & 0x3FFF_FFFF_FFFF_FFFF              # 62 bits rand_b
+    return str(uuid.UUID(int=value))
 
 
 class LocalAuthService:
@@ -17,22 +80,46 @@ class LocalAuthService:
         # Simple JWT secret for local development
         self.jwt_secret = "local-dev-secret-key-change-in-production"
         self.algorithm = "HS256"
+        self._algorithms = [self.algorithm]  # reused by every decode
         self.access_token_expire_minutes = 30
+        self.bcrypt_rounds = int(settings.bcrypt_rounds or 10)
+        self.argon2_hasher = None
+        if settings.password_hash_scheme.lower() == "argon2" and ARGON2_AVAILABLE:
+            self.argon2_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
     
     def hash_password(self, password: str) -> str:
-        """Hash password using bcrypt"""
+        """Hash password using argon2id when configured, otherwise bcrypt"""
+        if self.argon2_hasher is not None:
+            return self.argon2_hasher.hash(password)
+        
         # Encode password to bytes and hash it
         password_bytes = password.encode('utf-8')
-        salt = bcrypt_lib.gensalt()
+        salt = bcrypt_lib.gensalt(rounds=self.bcrypt_rounds)
         hashed = bcrypt_lib.hashpw(password_bytes, salt)
         return hashed.decode('utf-8')
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Verify password against hash"""
-        # Encode both to bytes for comparison
-        password_bytes = plain_password.encode('utf-8')
-        hashed_bytes = hashed_password.encode('utf-8')
-        return bcrypt_lib.checkpw(password_bytes, hashed_bytes)
+        """Verify password against hash (argon2 or legacy bcrypt)"""
+        if hashed_password.startswith("$argon2"):
+            if not ARGON2_AVAILABLE:
+                return False
+            try:
+                return (self.argon2_hasher or PasswordHasher()).verify(hashed_password, plain_password)
+            except (VerificationError, InvalidHashError):
+                return False
+        
+        # bcrypt hashes are pure ASCII, so the cheaper ascii codec suffices
+        return _bcrypt_checkpw(bytes(plain_password, 'utf-8'), hashed_password.encode('ascii'))
+    
+    async def hash_password_async(self, password: str) -> str:
+        """Hash password in the hashing thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(_HASH_POOL, self.hash_password, password)
+    
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify password in the hashing thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(
+            _HASH_POOL, self.verify_password, plain_password, hashed_password
+        )
     
     def create_access_token(self, data: Dict[str, Any]) -> str:
         """Create JWT access token (no expiration)"""
@@ -45,51 +132,61 @@ class LocalAuthService:
         return encoded_jwt
     
     def verify_token(self, token: str) -> Dict[str, Any]:
-        """Verify JWT token"""
+        """Verify JWT token (decoded payloads are cached until exp, at most 5 minutes)"""
+        key = hashlib.sha256(token.encode('utf-8')).digest()
+        with _TOKEN_CACHE_LOCK:
+            payload = _TOKEN_CACHE.get(key)
+        if payload is not None:
+            exp = payload.get("exp")
+            if exp is None or exp > time.time():
+                return payload
+            with _TOKEN_CACHE_LOCK:
+                _TOKEN_CACHE.pop(key, None)
+        
         try:
-            payload = jwt.decode(token, self.jwt_secret, algorithms=[self.algorithm])
-            return payload
-        except JWTError as e:
+            payload = jwt.decode(token, self.jwt_secret, algorithms=self._algorithms)
+        except jwt.InvalidTokenError as e:
             raise ValueError(f"Invalid token: {str(e)}")
+        
+        with _TOKEN_CACHE_LOCK:
+            _TOKEN_CACHE[key] = payload
+        return payload
     
     async def create_tourist_account(self, db: AsyncSession, email: str, password: str, **kwargs) -> str:
         """Create a new tourist account locally"""
-        # Check if user already exists
-        result = await db.execute(select(Tourist).where(Tourist.email == email))
-        existing_user = result.scalar_one_or_none()
-        
-        if existing_user:
-            raise ValueError("User already exists")
-        
-        # Generate UUID-like ID
-        user_id = secrets.token_hex(16)
-        hashed_password = self.hash_password(password)
+        # Generate time-ordered UUIDv7 ID
+        user_id = _uuid7()
+        hashed_password = await self.hash_password_async(password)
         
-        tourist = Tourist(
+        # Single round-trip; the unique citext email constraint rejects duplicates atomically
+        stmt = pg_insert(Tourist).values(
             id=user_id,
             email=email,
             name=kwargs.get('name'),
             phone=kwargs.get('phone'),
             emergency_contact=kwargs.get('emergency_contact'),
             emergency_phone=kwargs.get('emergency_phone'),
-            password_hash=hashed_password  # We'll need to add this field
-        )
+            password_hash=hashed_password
+        ).on_conflict_do_nothing(index_elements=[Tourist.email]).returning(Tourist.id)
+        
+        result = await db.execute(stmt)
+        if result.scalar() is None:
+            await db.rollback()
+            raise ValueError("User already exists")
         
-        db.add(tourist)
         await db.commit()
-        await db.refresh(tourist)
         
         return user_id
     
     async def authenticate_tourist(self, db: AsyncSession, email: str, password: str) -> Optional[Dict[str, Any]]:
         """Authenticate tourist user"""
-        result = await db.execute(select(Tourist).where(Tourist.email == email))
+        result = await db.execute(_TOURIST_BY_EMAIL, {"email": email.lower()})
         user = result.scalar_one_or_none()
         
-        if not user or not hasattr(user, 'password_hash'):
+        if not user or user.password_hash is None:
             return None
         
-        if not self.verify_password(password, user.password_hash):
+        if not await self.verify_password_async(password, user.password_hash):
             return None
         
         # Create access token
@@ -109,18 +206,12 @@ class LocalAuthService:
     
     async def create_authority_account(self, db: AsyncSession, email: str, password: str, **kwargs) -> str:
         """Create a new authority account locally"""
-        # Check if user already exists
-        result = await db.execute(select(Authority).where(Authority.email == email))
-        existing_user = result.scalar_one_or_none()
-        
-        if existing_user:
-            raise ValueError("Authority user already exists")
+        # Generate time-ordered UUIDv7 ID
+        user_id = _uuid7()
+        hashed_password = await self.hash_password_async(password)
         
-        # Generate UUID-like ID
-        user_id = secrets.token_hex(16)
-        hashed_password = self.hash_password(password)
-        
-        authority = Authority(
+        # Single round-trip; the unique lower(email) index rejects duplicates atomically
+        stmt = pg_insert(Authority).values(
             id=user_id,
             email=email,
             name=kwargs.get('name'),
@@ -128,28 +219,31 @@ class LocalAuthService:
             department=kwargs.get('department'),
             rank=kwargs.get('rank'),
             password_hash=hashed_password
-        )
+        ).on_conflict_do_nothing(index_elements=[func.lower(Authority.email)]).returning(Authority.id)
+        
+        result = await db.execute(stmt)
+        if result.scalar() is None:
+            await db.rollback()
+            raise ValueError("Authority user already exists")
         
-        db.add(authority)
         await db.commit()
-        await db.refresh(authority)
         
         return user_id
     
     async def authenticate_authority(self, db: AsyncSession, email: str, password: str) -> Optional[Dict[str, Any]]:
         """Authenticate authority user"""
-        result = await db.execute(select(Authority).where(Authority.email == email))
+        result = await db.execute(_AUTHORITY_BY_EMAIL, {"email": email.lower()})
         user = result.scalar_one_or_none()
         
-        if not user or not hasattr(user, 'password_hash'):
+        if not user or user.password_hash is None:
             return None
         
-        if not self.verify_password(password, user.password_hash):
+        if not await self.verify_password_async(password, user.password_hash):
             return None
         
         # Determine role - admin users have specific email or rank
         role = "authority"
-        if email == "admin" or (hasattr(user, 'rank') and user.rank and "admin" in user.rank.lower()):
+        if email == "admin" or (user.rank and "admin" in user.rank.lower()):
             role = "admin"
         
         # Create access token
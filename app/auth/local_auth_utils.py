@@ -1,72 +1,120 @@
 """
 Local authentication utilities that don't depend on Supabase
 """
+from dataclasses import dataclass
 from typing import Optional, Dict, Any
-from fastapi import HTTPException, Depends, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import HTTPException, Depends, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy.orm import load_only
 
 from .local_auth import local_auth
+from .user_cache import (
+    CachedTourist, CachedAuthority,
+    get_cached_tourist, cache_tourist, get_cached_authority, cache_authority,
+)
 from ..database import get_db
 from ..models.database_models import Tourist, Authority
 
-security = HTTPBearer()
-
-
+_TOURIST_ROLES = frozenset({"tourist", "admin"})
+_AUTHORITY_ROLES = frozenset({"authority", "admin"})
+
+# Raised as-is for every missing/malformed Authorization header
+_NOT_AUTHENTICATED = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Not authenticated",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+# Columns routes read off the auth dependencies (mirrors the user_cache snapshots);
+# skips password hashes, emergency contacts, coordinates and audit timestamps
+_TOURIST_AUTH_COLUMNS = [load_only(
+    Tourist.id, Tourist.email, Tourist.name, Tourist.phone,
+    Tourist.safety_score, Tourist.is_active, Tourist.last_seen
+)]
+_AUTHORITY_AUTH_COLUMNS = [load_only(
+    Authority.id, Authority.email, Authority.name, Authority.badge_number,
+    Authority.department, Authority.rank, Authority.phone, Authority.is_active
+)]
+
+
+@dataclass(slots=True, frozen=True)
 class AuthUser:
-    def __init__(self, user_id: str, email: str, role: Optional[str] = None):
-        self.id = user_id
-        self.email = email
-        self.role = role or "tourist"
-
-
-async def create_user_account(email: str, password: str, role: str = "tourist", **kwargs) -> Dict[str, Any]:
-    """Create a new user account locally"""
-    from ..database import AsyncSessionLocal
-    
-    async with AsyncSessionLocal() as db:
-        try:
-            if role == "tourist":
-                user_id = await local_auth.create_tourist_account(db, email, password, **kwargs)
-            elif role == "authority":
-                user_id = await local_auth.create_authority_account(db, email, password, **kwargs)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Unsupported role: {role}"
-                )
-            
-            return {"user": {"id": user_id, "email": email}}
-        except ValueError as e:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=str(e)
-            )
+    id: str
+    email: str
+    role: str = "tourist"
 
 
-async def authenticate_user(email: str, password: str, role: str = "tourist") -> Dict[str, Any]:
-    """Authenticate user locally"""
-    from ..database import AsyncSessionLocal
-    
-    async with AsyncSessionLocal() as db:
+async def create_user_account(db: AsyncSession, email: str, password: str, role: str = "tourist", **kwargs) -> Dict[str, Any]:
+    """Create a new user account locally using the request's session"""
+    try:
         if role == "tourist":
-            result = await local_auth.authenticate_tourist(db, email, password)
+            user_id = await local_auth.create_tourist_account(db, email, password, **kwargs)
+        elif role == "authority":
+            user_id = await local_auth.create_authority_account(db, email, password, **kwargs)
         else:
-            result = await local_auth.authenticate_authority(db, email, password)
-        
-        if not result:
             raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid credentials"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported role: {role}"
             )
         
-        return result
+        return {"user": {"id": user_id, "email": email}}
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> AuthUser:
+async def authenticate_user(db: AsyncSession, email: str, password: str, role: str = "tourist") -> Dict[str, Any]:
+    """Authenticate user locally using the request's session"""
+    if role == "tourist":
+        result = await local_auth.authenticate_tourist(db, email, password)
+    else:
+        result = await local_auth.authenticate_authority(db, email, password)
+    
+    if not result:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid credentials"
+        )
+    
+    return result
+
+
+def _bearer_token(authorization: str) -> Optional[str]:
+    """Extract the token from an Authorization header value"""
+    scheme, _, token = authorization.partition(" ")
+    if not token or scheme.lower() != "bearer":
+        return None
+    return token
+
+
+def resolve_auth_user(authorization: str) -> Optional[AuthUser]:
+    """AuthUser for a valid bearer Authorization header, or None"""
+    token = _bearer_token(authorization)
+    if token is None:
+        return None
+    try:
+        payload = local_auth.verify_token(token)
+    except ValueError:
+        return None
+    user_id = payload.get("sub")
+    email = payload.get("email")
+    if not user_id or not email:
+        return None
+    return AuthUser(id=user_id, email=email, role=payload.get("role") or "tourist")
+
+
+async def get_current_user(request: Request) -> AuthUser:
     """Get current authenticated user from JWT token"""
-    token = credentials.credentials
+    # Set by AuthMemoMiddleware when the header already verified
+    user = getattr(request.state, "auth_user", None)
+    if user is not None:
+        return user
+    
+    token = _bearer_token(request.headers.get("authorization", ""))
+    if token is None:
+        raise _NOT_AUTHENTICATED
     
     try:
         payload = local_auth.verify_token(token)
@@ -87,19 +135,22 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Invalid token payload"
         )
     
-    return AuthUser(user_id=user_id, email=email, role=role)
+    return AuthUser(id=user_id, email=email, role=role or "tourist")
 
 
-async def get_current_tourist(current_user: AuthUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> Tourist:
-    """Get current tourist from database"""
-    if current_user.role not in ["tourist", "admin"]:
+async def get_current_tourist(current_user: AuthUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> CachedTourist:
+    """Get a read-only snapshot of the current tourist (Redis cache, then database)"""
+    if current_user.role not in _TOURIST_ROLES:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"Access denied: Tourist role required. Current role: {current_user.role}"
         )
     
-    result = await db.execute(select(Tourist).where(Tourist.id == current_user.id))
-    tourist = result.scalar_one_or_none()
+    cached = await get_cached_tourist(current_user.id)
+    if cached is not None:
+        return cached
+    
+    tourist = await db.get(Tourist, current_user.id, options=_TOURIST_AUTH_COLUMNS)
     
     if not tourist:
         raise HTTPException(
@@ -107,19 +158,22 @@ async def get_current_tourist(current_user: AuthUser = Depends(get_current_user)
             detail="Tourist not found"
         )
     
-    return tourist
+    return await cache_tourist(tourist)
 
 
-async def get_current_authority(current_user: AuthUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> Authority:
-    """Get current authority from database"""
-    if current_user.role not in ["authority", "admin"]:
+async def get_current_authority(current_user: AuthUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> CachedAuthority:
+    """Get a read-only snapshot of the current authority (Redis cache, then database)"""
+    if current_user.role not in _AUTHORITY_ROLES:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied: Authority role required"
         )
     
-    result = await db.execute(select(Authority).where(Authority.id == current_user.id))
-    authority = result.scalar_one_or_none()
+    cached = await get_cached_authority(current_user.id)
+    if cached is not None:
+        return cached
+    
+    authority = await db.get(Authority, current_user.id, options=_AUTHORITY_AUTH_COLUMNS)
     
     if not authority:
         raise HTTPException(
@@ -127,7 +181,7 @@ async def get_current_authority(current_user: AuthUser = Depends(get_current_use
             detail="Authority not found"
         )
     
-    return authority
+    return await cache_authority(authority)
 
 
 async def get_current_admin(current_user: AuthUser = Depends(get_current_user)) -> AuthUser:
@@ -0,0 +1,23 @@
+"""
+Request-scoped auth memo: verify the bearer token once and share it via request.state
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .local_auth_utils import resolve_auth_user
+
+
+class AuthMemoMiddleware:
+    """Stash the verified AuthUser as request.state.auth_user for HTTP requests"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == b"authorization":
+                    user = resolve_auth_user(value.decode("latin-1"))
+                    if user is not None:
+                        scope.setdefault("state", {})["auth_user"] = user
+                    break
+        await self.app(scope, receive, send)
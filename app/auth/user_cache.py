@@ -0,0 +1,127 @@
+"""
+Short-lived Redis cache of the Tourist/Authority rows loaded by the auth dependencies
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Any, Dict
+import aioredis
+import orjson
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+USER_CACHE_TTL = 60  # seconds
+
+_redis: Optional[aioredis.Redis] = None
+
+
+@dataclass(slots=True, frozen=True)
+class CachedTourist:
+    """Read-only snapshot of the Tourist columns routes read from get_current_tourist"""
+    id: str
+    email: str
+    name: Optional[str] = None
+    phone: Optional[str] = None
+    safety_score: Optional[int] = None
+    is_active: Optional[bool] = None
+    last_seen: Optional[datetime] = None
+
+
+@dataclass(slots=True, frozen=True)
+class CachedAuthority:
+    """Read-only snapshot of the Authority columns routes read from get_current_authority"""
+    id: str
+    email: str
+    name: Optional[str] = None
+    badge_number: Optional[str] = None
+    department: Optional[str] = None
+    rank: Optional[str] = None
+    phone: Optional[str] = None
+    is_active: Optional[bool] = None
+
+
+def _get_redis() -> aioredis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = aioredis.from_url(settings.redis_url)
+    return _redis
+
+
+async def init_user_cache() -> None:
+    """Build the Redis client and open a connection before the first request"""
+    try:
+        await _get_redis().ping()
+    except Exception as e:
+        logger.warning("User cache Redis unavailable at startup: %s", e)
+
+
+async def close_user_cache() -> None:
+    """Close the Redis client on shutdown"""
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
+
+
+def _snapshot(cls, row: Any):
+    """Copy the snapshot's columns off an ORM row"""
+    return cls(**{field: getattr(row, field) for field in cls.__slots__})
+
+
+async def _get(key: str) -> Optional[Dict[str, Any]]:
+    try:
+        raw = await _get_redis().get(key)
+    except Exception as e:
+        logger.warning("User cache read failed for %s: %s", key, e)
+        return None
+    return orjson.loads(raw) if raw else None
+
+
+async def _set(key: str, value: Any) -> None:
+    try:
+        await _get_redis().setex(key, USER_CACHE_TTL, orjson.dumps(value))
+    except Exception as e:
+        logger.warning("User cache write failed for %s: %s", key, e)
+
+
+async def get_cached_tourist(user_id: str) -> Optional[CachedTourist]:
+    """Return the cached tourist snapshot, or None on miss"""
+    data = await _get(f"tourist:{user_id}")
+    if data is None:
+        return None
+    if data.get("last_seen"):
+        data["last_seen"] = datetime.fromisoformat(data["last_seen"])
+    return CachedTourist(**data)
+
+
+async def cache_tourist(tourist: Any) -> CachedTourist:
+    """Store and return a tourist row snapshot"""
+    snapshot = _snapshot(CachedTourist, tourist)
+    await _set(f"tourist:{snapshot.id}", snapshot)
+    return snapshot
+
+
+async def get_cached_authority(user_id: str) -> Optional[CachedAuthority]:
+    """Return the cached authority snapshot, or None on miss"""
+    data = await _get(f"authority:{user_id}")
+    if data is None:
+        return None
+    return CachedAuthority(**data)
+
+
+async def cache_authority(authority: Any) -> CachedAuthority:
+    """Store and return an authority row snapshot"""
+    snapshot = _snapshot(CachedAuthority, authority)
+    await _set(f"authority:{snapshot.id}", snapshot)
+    return snapshot
+
+
+async def invalidate_user(user_id: str) -> None:
+    """Drop cached tourist/authority snapshots after the row is modified"""
+    try:
+        await _get_redis().delete(f"tourist:{user_id}", f"authority:{user_id}")
+    except Exception as e:
+        logger.warning("User cache invalidation failed for %s: %s", user_id, e)
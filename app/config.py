@@ -1,7 +1,7 @@
 from functools import lru_cache
 from pydantic_settings import BaseSettings
-from pydantic import Field
-from typing import List, Optional
+from pydantic import Field, PrivateAttr, model_validator
+from typing import FrozenSet, List, Optional
 
 
 class Settings(BaseSettings):
@@ -12,6 +12,8 @@ class Settings(BaseSettings):
 
     database_url: str = Field(..., env="DATABASE_URL")
     sync_database_url: str = Field(..., env="SYNC_DATABASE_URL")
+    db_pool_size: int = Field(20, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(40, env="DB_MAX_OVERFLOW")
 
     redis_url: str = Field("redis://redis:6379/0", env="REDIS_URL")
 
@@ -22,23 +24,42 @@ class Settings(BaseSettings):
     twilio_from_number: Optional[str] = Field(None, env="TWILIO_FROM_NUMBER")
 
     models_dir: str = Field("./models_store", env="MODELS_DIR")
+    # Dynamic int8 quantization of the LSTM autoencoder for CPU inference
+    sequence_model_quantize: bool = Field(True, env="SEQUENCE_MODEL_QUANTIZE")
+
+    # Password hashing: "bcrypt" (default) or "argon2" (requires argon2-cffi)
+    password_hash_scheme: str = Field("bcrypt", env="PASSWORD_HASH_SCHEME")
+    bcrypt_rounds: int = Field(10, env="BCRYPT_ROUNDS")
 
     allowed_origins: Optional[str] = Field(None, env="ALLOWED_ORIGINS")
 
+    # Alembic at startup: "skip" (run by a separate deploy job), "sync" or "async"
+    migration_mode: str = Field("skip", env="MIGRATION_MODE")
+
     class Config:
         env_file = ".env"
         case_sensitive = False
         extra = "ignore"  # Ignore extra fields in .env file
 
-    @property 
-    def get_allowed_origins(self) -> List[str]:
-        """Get CORS allowed origins, handling both single string and list"""
-        if not self.allowed_origins:
+    _allowed_origins_list: List[str] = PrivateAttr(default_factory=list)
+    _origins_frozenset: FrozenSet[str] = PrivateAttr(default_factory=frozenset)
+
+    @model_validator(mode="after")
+    def _parse_allowed_origins(self) -> "Settings":
+        """Parse ALLOWED_ORIGINS once at construction"""
+        self._allowed_origins_list = self._split_origins(self.allowed_origins)
+        self._origins_frozenset = frozenset(self._allowed_origins_list)
+        return self
+
+    @staticmethod
+    def _split_origins(value) -> List[str]:
+        """Handle both single string and list"""
+        if not value:
             return ["*"]
         
-        if isinstance(self.allowed_origins, str):
+        if isinstance(value, str):
             # Handle JSON-like string from .env: '["*"]' or '*'
-            origins_str = self.allowed_origins.strip()
+            origins_str = value.strip()
             
             # Remove brackets and quotes if present
             if origins_str.startswith('[') and origins_str.endswith(']'):
@@ -52,11 +73,20 @@ class Settings(BaseSettings):
                     origins.append(clean_origin)
             return origins if origins else ["*"]
         
-        if isinstance(self.allowed_origins, list):
-            return self.allowed_origins
+        if isinstance(value, list):
+            return value
             
         return ["*"]
 
+    @property
+    def get_allowed_origins(self) -> List[str]:
+        """Get CORS allowed origins (precomputed)"""
+        return self._allowed_origins_list
+
+    @property
+    def allowed_origins_set(self) -> FrozenSet[str]:
+        """CORS allowed origins for O(1) membership checks"""
+        return self._origins_frozenset
 
 @lru_cache()
 def get_settings() -> Settings:
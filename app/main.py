@@ -1,11 +1,23 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
+import asyncio
 import logging
-import traceback
+import os
 
 from .config import get_settings
+from .database import dispose_engine
+from .auth.user_cache import init_user_cache, close_user_cache
+from .services.dashboard_cache import close_dashboard_cache
+from .services.websocket_manager import initialize_websocket_manager, cleanup_websocket_manager
+from .models.model_registry import refresh_model_files
+from .services.anomaly import warm_anomaly_model
+from .services.sequence import warm_sequence_model
+from .auth.middleware import AuthMemoMiddleware
+from .utils.request_time import RequestTimeMiddleware
 
 # Configure logging
 logging.basicConfig(
@@ -16,10 +28,64 @@ logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
-app = FastAPI(title=settings.app_name, debug=settings.app_debug)
+# Startup migration state, exposed via /health/migrations
+_migration_status = {"mode": settings.migration_mode.lower(), "state": "skipped", "error": None}
+
+
+def _run_migrations() -> None:
+    """Run `alembic upgrade head` (blocking)"""
+    from alembic import command
+    from alembic.config import Config
+
+    # No ini file: keeps alembic's fileConfig() from resetting app logging
+    cfg = Config()
+    cfg.set_main_option(
+        "script_location",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic"),
+    )
+    _migration_status["state"] = "running"
+    try:
+        command.upgrade(cfg, "head")
+        _migration_status["state"] = "completed"
+    except Exception as e:
+        _migration_status["state"] = "failed"
+        _migration_status["error"] = str(e)
+        logger.error("Database migration failed: %s", e)
+        raise
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    mode = _migration_status["mode"]
+    if mode == "sync":
+        _run_migrations()
+    elif mode == "async":
+        # Serve traffic immediately; readiness can poll /health/migrations
+        app.state.migration_task = asyncio.create_task(asyncio.to_thread(_run_migrations))
+    await init_user_cache()
+    await initialize_websocket_manager()
+    refresh_model_files()
+    # Load the ML models before serving so the first /ai request doesn't pay for it
+    await asyncio.gather(
+        asyncio.to_thread(warm_anomaly_model),
+        asyncio.to_thread(warm_sequence_model)
+    )
+    yield
+    await cleanup_websocket_manager()
+    await close_user_cache()
+    await close_dashboard_cache()
+    await dispose_engine()
+
+
+app = FastAPI(
+    title=settings.app_name,
+    debug=settings.app_debug,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # CORS - Allow frontend to access the API
-origins = settings.get_allowed_origins if hasattr(settings, 'get_allowed_origins') else settings.allowed_origins
+origins = settings.get_allowed_origins
 if not origins or origins == ["*"]:
     # Default to allow localhost and common frontend ports
     origins = [
@@ -32,6 +98,12 @@ if not origins or origins == ["*"]:
         "*"  # Allow all for development
     ]
 
+# Deduplicate (order-preserving) and freeze
+origins = tuple(dict.fromkeys(origins))
+if "*" in origins and settings.app_env == "production":
+    logger.warning("CORS wildcard origin ignored in production; set ALLOWED_ORIGINS explicitly")
+    origins = tuple(o for o in origins if o != "*")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -41,15 +113,20 @@ app.add_middleware(
     expose_headers=["*"],  # Expose all headers to frontend
 )
 
-logger.info(f"CORS configured with origins: {origins}")
+logger.info("CORS configured with origins: %s", origins)
+
+# Verify the bearer token once per request; auth dependencies read request.state
+app.add_middleware(AuthMemoMiddleware)
+app.add_middleware(RequestTimeMiddleware)
 
 
 # Global exception handler for better error responses
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Catch all unhandled exceptions and return proper error response"""
-    logger.error(f"Unhandled exception: {str(exc)}\n{traceback.format_exc()}")
-    return JSONResponse(
+    # logger.exception defers traceback formatting to the handler
+    logger.exception("Unhandled exception: %s", exc)
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "detail": "Internal server error occurred. Please check server logs for details.",
@@ -61,13 +138,15 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors with detailed messages"""
-    logger.warning(f"Validation error: {exc.errors()}")
-    return JSONResponse(
+    errors = exc.errors()
+    logger.warning("Validation error: %s", errors)
+    # jsonable_encoder: errors can carry exception objects and body may be bytes
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content={
-            "detail": exc.errors(),
+        content=jsonable_encoder({
+            "detail": errors,
             "body": exc.body
-        }
+        })
     )
 
 
@@ -76,6 +155,11 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/health/migrations")
+async def health_migrations():
+    return _migration_status
+
+
 # Include routers (registered later once created)
 from .routers import tourist, authority, admin, ai, notify  # noqa: E402
 
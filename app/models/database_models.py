@@ -1,13 +1,33 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, Enum, ForeignKey, CheckConstraint, Index, table, column
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.dialects.postgresql import UUID, CITEXT
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, backref, validates
 from sqlalchemy.sql import func
 import enum
+import orjson
 from datetime import datetime
 
 Base = declarative_base()
 
 
+class OrjsonText(TypeDecorator):
+    """JSON stored in a TEXT column, encoded/decoded with orjson"""
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return orjson.dumps(value).decode() if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return orjson.loads(value) if value else None
+
+
+def _enum_names(enum_cls):
+    """Postgres enum labels are the Python member names (e.g. 'ACTIVE')"""
+    return [e.name for e in enum_cls]
+
+
 class UserRole(enum.Enum):
     TOURIST = "tourist"
     AUTHORITY = "authority"
@@ -30,6 +50,9 @@ class AlertType(enum.Enum):
     MANUAL = "manual"  # For tourist-reported incidents via E-FIR
 
 
+_ALERT_TYPE_VALUES = frozenset(e.value for e in AlertType)
+
+
 class AlertSeverity(enum.Enum):
     LOW = "low"
     MEDIUM = "medium"
@@ -60,8 +83,8 @@ class BroadcastSeverity(enum.Enum):
 class Tourist(Base):
     __tablename__ = "tourists"
 
-    id = Column(String, primary_key=True)  # Supabase UUID
-    email = Column(String, unique=True, nullable=False)
+    id = Column(UUID(as_uuid=False), primary_key=True)  # Supabase/UUIDv7, native uuid
+    email = Column(CITEXT, unique=True, nullable=False)  # case-insensitive unique
     name = Column(String, nullable=True)
     phone = Column(String, nullable=True)
     emergency_contact = Column(String, nullable=True)
@@ -76,9 +99,13 @@ class Tourist(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    trips = relationship("Trip", back_populates="tourist")
-    locations = relationship("Location", back_populates="tourist")
-    alerts = relationship("Alert", back_populates="tourist")
+    trips = relationship("Trip", back_populates="tourist", lazy="raise")
+    locations = relationship("Location", back_populates="tourist", lazy="raise")
+    alerts = relationship("Alert", back_populates="tourist", lazy="raise")
+
+
+# Canonical UUID text; authorities.id stays varchar but must cast to uuid
+AUTHORITY_ID_PATTERN = "^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
 
 
 class Authority(Base):
@@ -96,29 +123,34 @@ class Authority(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # users_unified and ix_authorities_created_uuid cast id to uuid
+    __table_args__ = (
+        CheckConstraint(f"id ~ '{AUTHORITY_ID_PATTERN}'", name="ck_authorities_id_uuid"),
+    )
+
 
 class Trip(Base):
     __tablename__ = "trips"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    tourist_id = Column(String, ForeignKey("tourists.id"), nullable=False)
+    tourist_id = Column(UUID(as_uuid=False), ForeignKey("tourists.id"), nullable=False)
     destination = Column(String, nullable=False)
     start_date = Column(DateTime(timezone=True), nullable=True)
     end_date = Column(DateTime(timezone=True), nullable=True)
-    status = Column(Enum(TripStatus), default=TripStatus.PLANNED)
+    status = Column(Enum(TripStatus, name='tripstatus', native_enum=True, values_callable=_enum_names), default=TripStatus.PLANNED)
     itinerary = Column(Text, nullable=True)  # JSON string
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    tourist = relationship("Tourist", back_populates="trips")
+    tourist = relationship("Tourist", back_populates="trips", lazy="raise")
 
 
 class Location(Base):
     __tablename__ = "locations"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    tourist_id = Column(String, ForeignKey("tourists.id"), nullable=False)
+    tourist_id = Column(UUID(as_uuid=False), ForeignKey("tourists.id"), nullable=False)
     trip_id = Column(Integer, ForeignKey("trips.id"), nullable=True)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
@@ -133,20 +165,21 @@ class Location(Base):
     safety_score_updated_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
-    tourist = relationship("Tourist", back_populates="locations")
+    tourist = relationship("Tourist", back_populates="locations", lazy="raise")
 
 
 class Alert(Base):
     __tablename__ = "alerts"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    tourist_id = Column(String, ForeignKey("tourists.id"), nullable=False)
+    tourist_id = Column(UUID(as_uuid=False), ForeignKey("tourists.id"), nullable=False)
     location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
-    type = Column(Enum(AlertType), nullable=False)
-    severity = Column(Enum(AlertSeverity), nullable=False)
+    # Plain string (AlertType values) so fetched rows skip enum hydration
+    type = Column(String(16), nullable=False)
+    severity = Column(Enum(AlertSeverity, name='alertseverity', native_enum=True, values_callable=_enum_names), nullable=False)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    alert_metadata = Column(Text, nullable=True)  # JSON string for additional data
+    alert_metadata = Column(OrjsonText, nullable=True)  # JSON for additional data
     is_acknowledged = Column(Boolean, default=False)
     acknowledged_by = Column(String, ForeignKey("authorities.id"), nullable=True)
     acknowledged_at = Column(DateTime(timezone=True), nullable=True)
@@ -157,7 +190,22 @@ class Alert(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    tourist = relationship("Tourist", back_populates="alerts")
+    tourist = relationship("Tourist", back_populates="alerts", lazy="raise")
+
+    __table_args__ = (
+        CheckConstraint(
+            "type IN (" + ", ".join(f"'{e.value}'" for e in AlertType) + ")",
+            name="ck_alerts_type"
+        ),
+    )
+
+    @validates("type")
+    def _validate_type(self, key, value):
+        if isinstance(value, AlertType):
+            return value.value
+        if value not in _ALERT_TYPE_VALUES:
+            raise ValueError(f"Invalid alert type: {value}")
+        return value
 
 
 class RestrictedZone(Base):
@@ -166,7 +214,7 @@ class RestrictedZone(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    zone_type = Column(Enum(ZoneType), nullable=False)
+    zone_type = Column(Enum(ZoneType, name='zonetype', native_enum=True, values_callable=_enum_names), nullable=False)
     # Simple lat/lon bounds for zone definition (center point and radius or bounding box)
     center_latitude = Column(Float, nullable=False)
     center_longitude = Column(Float, nullable=False)
@@ -193,6 +241,11 @@ class Incident(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # One incident per alert; the acknowledge upsert's ON CONFLICT (alert_id) target
+    __table_args__ = (
+        Index("ux_incidents_alert_id", "alert_id", unique=True),
+    )
+
 
 class EFIR(Base):
     """Electronic First Information Report - Immutable blockchain-backed records"""
@@ -202,7 +255,7 @@ class EFIR(Base):
     efir_number = Column(String, unique=True, nullable=False)  # EFIR-YYYYMMDD-NNNN
     incident_id = Column(Integer, ForeignKey("incidents.id"), nullable=True)  # Nullable for tourist reports
     alert_id = Column(Integer, ForeignKey("alerts.id"), nullable=False)
-    tourist_id = Column(String, ForeignKey("tourists.id"), nullable=False)
+    tourist_id = Column(UUID(as_uuid=False), ForeignKey("tourists.id"), nullable=False)
     
     # Blockchain data
     blockchain_tx_id = Column(String, unique=True, nullable=False)
@@ -232,8 +285,8 @@ class EFIR(Base):
     report_source = Column(String, nullable=True)  # 'tourist', 'authority'
     
     # Additional details
-    witnesses = Column(Text, nullable=True)  # JSON array
-    evidence = Column(Text, nullable=True)  # JSON array of evidence items
+    witnesses = Column(OrjsonText, nullable=True)  # JSON array
+    evidence = Column(OrjsonText, nullable=True)  # JSON array of evidence items
     officer_notes = Column(Text, nullable=True)
     
     # Status (only for tracking, not for modification)
@@ -245,7 +298,7 @@ class EFIR(Base):
     generated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Additional metadata
-    additional_data = Column(Text, nullable=True)  # JSON for additional data
+    additional_data = Column(OrjsonText, nullable=True)  # JSON for additional data
 
 
 class UserDevice(Base):
@@ -253,7 +306,7 @@ class UserDevice(Base):
     __tablename__ = "user_devices"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(String, ForeignKey("tourists.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=False), ForeignKey("tourists.id", ondelete="CASCADE"), nullable=False)
     device_token = Column(String, unique=True, nullable=False)  # FCM token
     device_type = Column(String, nullable=False)  # 'ios' or 'android'
     device_name = Column(String, nullable=True)  # e.g., "iPhone 13 Pro"
@@ -264,7 +317,7 @@ class UserDevice(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationship
-    tourist = relationship("Tourist", backref="devices")
+    tourist = relationship("Tourist", backref=backref("devices", lazy="raise"), lazy="raise")
 
 
 class EmergencyBroadcast(Base):
@@ -273,10 +326,10 @@ class EmergencyBroadcast(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     broadcast_id = Column(String, unique=True, nullable=False)  # BCAST-YYYYMMDD-NNNN
-    broadcast_type = Column(Enum(BroadcastType, name='broadcast_type', values_callable=lambda obj: [e.name for e in obj]), nullable=False)
+    broadcast_type = Column(Enum(BroadcastType, name='broadcast_type', native_enum=True, values_callable=_enum_names), nullable=False)
     title = Column(String, nullable=False)
     message = Column(Text, nullable=False)
-    severity = Column(Enum(BroadcastSeverity, name='broadcast_severity', values_callable=lambda obj: [e.name for e in obj]), nullable=False)
+    severity = Column(Enum(BroadcastSeverity, name='broadcast_severity', native_enum=True, values_callable=_enum_names), nullable=False)
     alert_type = Column(String, nullable=True)  # natural_disaster, security_threat, etc.
     action_required = Column(String, nullable=True)  # evacuate, avoid_area, stay_indoors
 
@@ -289,7 +342,7 @@ class EmergencyBroadcast(Base):
     zone_id = Column(Integer, ForeignKey("restricted_zones.id", ondelete="SET NULL"), nullable=True)
 
     # Region broadcast fields (JSON: {min_lat, max_lat, min_lon, max_lon})
-    region_bounds = Column(Text, nullable=True)
+    region_bounds = Column(OrjsonText, nullable=True)
 
     # Metadata
     tourists_notified_count = Column(Integer, default=0)
@@ -306,9 +359,9 @@ class EmergencyBroadcast(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
-    zone = relationship("RestrictedZone", backref="broadcasts")
-    authority = relationship("Authority", backref="broadcasts")
-    acknowledgments = relationship("BroadcastAcknowledgment", back_populates="broadcast")
+    zone = relationship("RestrictedZone", backref=backref("broadcasts", lazy="raise"), lazy="raise")
+    authority = relationship("Authority", backref=backref("broadcasts", lazy="raise"), lazy="raise")
+    acknowledgments = relationship("BroadcastAcknowledgment", back_populates="broadcast", lazy="raise")
 
 
 class BroadcastAcknowledgment(Base):
@@ -317,7 +370,7 @@ class BroadcastAcknowledgment(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     broadcast_id = Column(Integer, ForeignKey("emergency_broadcasts.id", ondelete="CASCADE"), nullable=False)
-    tourist_id = Column(String, ForeignKey("tourists.id", ondelete="CASCADE"), nullable=False)
+    tourist_id = Column(UUID(as_uuid=False), ForeignKey("tourists.id", ondelete="CASCADE"), nullable=False)
     acknowledged_at = Column(DateTime(timezone=True), server_default=func.now())
     status = Column(String, nullable=True)  # 'safe', 'need_help', 'evacuating'
     location_lat = Column(Float, nullable=True)
@@ -325,5 +378,23 @@ class BroadcastAcknowledgment(Base):
     notes = Column(Text, nullable=True)
 
     # Relationships
-    broadcast = relationship("EmergencyBroadcast", back_populates="acknowledgments")
-    tourist = relationship("Tourist", backref="broadcast_acknowledgments")
+    broadcast = relationship("EmergencyBroadcast", back_populates="acknowledgments", lazy="raise")
+    tourist = relationship("Tourist", backref=backref("broadcast_acknowledgments", lazy="raise"), lazy="raise")
+
+
+# Read-only UNION ALL view of tourists + authorities (created by migration, not create_all)
+users_unified = table(
+    "users_unified",
+    column("id", UUID(as_uuid=False)),
+    column("email", String),
+    column("name", String),
+    column("phone", String),
+    column("is_active", Boolean),
+    column("created_at", DateTime(timezone=True)),
+    column("kind", String),
+    column("safety_score", Integer),
+    column("last_seen", DateTime(timezone=True)),
+    column("badge_number", String),
+    column("department", String),
+    column("rank", String),
+)
@@ -1,6 +1,7 @@
 import os
-import pickle
-from typing import Any
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import joblib
 from ..config import get_settings
 
 
@@ -10,16 +11,90 @@ def _models_dir() -> str:
     return settings.models_dir
 
 
+# Seconds a loaded detector trusts its model files before re-stat'ing them
+MODEL_STAMP_CHECK_INTERVAL = 1.0
+
+# name -> (file mtime, loaded object); a retrain in any process rewrites the
+# file, which changes its mtime and makes every worker load the new one
+_loaded_models: Dict[str, Tuple[int, Any]] = {}
+
+
 def save_model(obj: Any, name: str) -> str:
     path = os.path.join(_models_dir(), f"{name}.pkl")
-    with open(path, "wb") as f:
-        pickle.dump(obj, f)
+    # Uncompressed so numpy arrays can be memory-mapped on load; written to a
+    # temp file and swapped in so other workers never load a partial pickle
+    tmp_path = f"{path}.tmp"
+    joblib.dump(obj, tmp_path, compress=0, protocol=5)
+    os.replace(tmp_path, path)
     return path
 
 
 def load_model(name: str) -> Any:
     path = os.path.join(_models_dir(), f"{name}.pkl")
-    if not os.path.exists(path):
-        raise FileNotFoundError(path)
-    with open(path, "rb") as f:
-        return pickle.load(f)
+    mtime = os.stat(path).st_mtime_ns  # FileNotFoundError when not trained yet
+    cached = _loaded_models.get(name)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    # Arrays are mmapped read-only, so workers share pages via the OS cache;
+    # plain pickles written before the switch to joblib still load
+    obj = joblib.load(path, mmap_mode="r")
+    _loaded_models[name] = (mtime, obj)
+    return obj
+
+
+def model_stamp(*filenames: str) -> Tuple[Optional[int], ...]:
+    """mtimes of the given model files (None when missing); changes whenever any is rewritten"""
+    base = _models_dir()
+    stamp = []
+    for filename in filenames:
+        try:
+            stamp.append(os.stat(os.path.join(base, filename)).st_mtime_ns)
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def onnx_model_path(name: str) -> str:
+    return os.path.join(_models_dir(), f"{name}.onnx")
+
+
+def save_onnx_model(onnx_bytes: Optional[bytes], name: str) -> Optional[str]:
+    """Write an exported ONNX graph next to its pickle; None removes a stale export"""
+    path = onnx_model_path(name)
+    if onnx_bytes is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(onnx_bytes)
+    os.replace(tmp_path, path)
+    return path
+
+
+# Trained model files reported by /ai/models/status
+MODEL_FILES = {
+    "isolation_forest": "isolation_forest.pkl",
+    "lstm_autoencoder": "lstm_autoencoder.pth",
+}
+
+# (models dir mtime, presence map); creating or removing a file bumps the
+# directory mtime, so a retrain in another process invalidates every worker's copy
+_model_files_present: Optional[Tuple[int, Dict[str, bool]]] = None
+
+
+def refresh_model_files() -> Dict[str, bool]:
+    """Re-stat the model files (startup, after retraining, or on explicit refresh)"""
+    global _model_files_present
+    base = Path(_models_dir())
+    stamp = base.stat().st_mtime_ns
+    present = {name: base.joinpath(filename).is_file() for name, filename in MODEL_FILES.items()}
+    _model_files_present = (stamp, present)
+    return present
+
+
+def model_files_present() -> Dict[str, bool]:
+    """Presence of each model file; one directory stat unless a file was added or removed"""
+    if _model_files_present is None or os.stat(_models_dir()).st_mtime_ns != _model_files_present[0]:
+        return refresh_model_files()
+    return _model_files_present[1]
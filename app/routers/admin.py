@@ -1,16 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, func
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import base64
+import binascii
+import multiprocessing
+import uuid
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import select, update, desc, func, cast, case, table, column, bindparam, tuple_, Float, BigInteger
+import numpy as np
+import orjson
 
-from ..database import get_db
+from ..database import get_db, AsyncSessionLocal
 from ..utils.timezone import now_ist, ist_isoformat
 from ..auth.local_auth_utils import get_current_admin, AuthUser
-from ..models.database_models import Tourist, Authority, Location, Alert
-from ..services.anomaly import train_anomaly_model
-from ..services.sequence import train_sequence_model
+from ..auth.user_cache import invalidate_user
+from ..services.dashboard_cache import (
+    STATUS_KEY, analytics_key, get_cached_response, cache_response, invalidate_dashboard_cache
+)
+from ..models.database_models import Tourist, Authority, Location, Alert, users_unified
+from ..services.anomaly import train_anomaly_model_sync, reload_anomaly_model
+from ..services.sequence import train_sequence_model_sync, reload_sequence_model
 from ..services.websocket_manager import websocket_manager
 
 router = APIRouter()
@@ -25,56 +38,144 @@ class RetrainRequest(BaseModel):
     days_back: int = 30  # How many days of data to use
 
 
-async def retrain_models_background(model_types: List[str], days_back: int, db: AsyncSession):
+# Column layout handed to the anomaly/sequence trainers
+TRAINING_DTYPE = np.dtype([
+    ("latitude", "f8"),
+    ("longitude", "f8"),
+    ("speed", "f4"),
+    ("timestamp", "datetime64[ns]"),
+])
+
+TRAINING_FETCH_SIZE = 10_000
+
+# spawn: a clean interpreter, not a fork of the running event loop / torch threads
+_training_pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+
+# One retrain at a time; later requests queue behind it
+_retrain_lock = asyncio.Semaphore(1)
+
+
+def _to_training_array(rows) -> np.ndarray:
+    """(lat, lon, speed, epoch_seconds) rows -> structured array, converted column-wise"""
+    data = np.empty(len(rows), dtype=TRAINING_DTYPE)
+    if len(rows):
+        cols = np.array([tuple(r) for r in rows], dtype="f8")
+        data["latitude"] = cols[:, 0]
+        data["longitude"] = cols[:, 1]
+        data["speed"] = cols[:, 2]
+        data["timestamp"] = (cols[:, 3] * 1e9).astype("int64").astype("datetime64[ns]")
+    return data
+
+
+_pg_class = table("pg_class", column("relname"), column("reltuples"))
+
+
+def _approx_count(table_name: str, exact_query):
+    """pg_class.reltuples estimate (O(1)); falls back to the exact count if never analyzed (-1)"""
+    estimate = select(cast(_pg_class.c.reltuples, BigInteger)).where(
+        _pg_class.c.relname == table_name
+    ).scalar_subquery()
+    return case((estimate >= 0, estimate), else_=exact_query.scalar_subquery())
+
+
+# Dashboard statements are built once; requests only bind the cutoff
+_STATUS_COUNTS = select(
+    # Totals are display-only: planner estimates instead of full scans
+    _approx_count("tourists", select(func.count(Tourist.id))).label("tourists"),
+    _approx_count("authorities", select(func.count(Authority.id))).label("authorities"),
+    # Active users in the window
+    select(func.count(Tourist.id)).where(
+        Tourist.last_seen >= bindparam("cutoff")
+    ).scalar_subquery().label("active_tourists"),
+    # Recent alerts
+    select(func.count(Alert.id)).where(
+        Alert.created_at >= bindparam("cutoff")
+    ).scalar_subquery().label("recent_alerts")
+)
+
+_ALERTS_BY_TYPE = select(
+    Alert.type,
+    func.count(Alert.id).label("count")
+).where(
+    Alert.created_at >= bindparam("cutoff")
+).group_by(Alert.type)
+
+# Safety score distribution, bucketed and averaged in one aggregate pass
+_score = Tourist.safety_score
+_SAFETY_SCORE_STATS = select(
+    func.count().filter(_score < 40).label("critical"),
+    func.count().filter(_score >= 40, _score < 60).label("high_risk"),
+    func.count().filter(_score >= 60, _score < 80).label("medium_risk"),
+    func.count().filter(_score >= 80).label("low_risk"),
+    func.avg(_score).label("average"),
+    func.count().label("total")
+).where(
+    Tourist.is_active == True,
+    _score.isnot(None)
+)
+
+
+async def retrain_models_background(model_types: List[str], days_back: int, session_factory: async_sessionmaker):
     """Background task to retrain AI models"""
-    try:
-        cutoff_date = now_ist() - timedelta(days=days_back)
-        
-        # Get location data for training
-        locations_query = select(Location).where(
-            Location.timestamp >= cutoff_date
-        ).order_by(Location.timestamp)
-        
-        locations_result = await db.execute(locations_query)
-        locations = locations_result.scalars().all()
-        
-        # Convert to training data format
-        training_data = [
-            {
-                "latitude": loc.latitude,
-                "longitude": loc.longitude,
-                "speed": loc.speed or 0,
-                "timestamp": loc.timestamp.isoformat()
-            }
-            for loc in locations
-        ]
-        
-        results = {}
-        
-        # Retrain anomaly model
-        if "anomaly" in model_types:
-            anomaly_result = await train_anomaly_model(training_data)
-            results["anomaly"] = anomaly_result
-        
-        # Retrain sequence model
-        if "sequence" in model_types:
-            sequence_result = await train_sequence_model(training_data)
-            results["sequence"] = sequence_result
-        
-        # Broadcast completion status
-        await websocket_manager.publish_alert("admin", {
-            "type": "retrain_complete",
-            "results": results,
-            "timestamp": ist_isoformat()
-        })
-        
-    except Exception as e:
-        # Broadcast error status
-        await websocket_manager.publish_alert("admin", {
-            "type": "retrain_error",
-            "error": str(e),
-            "timestamp": datetime.utcnow().isoformat()
-        })
+    async with _retrain_lock:
+        try:
+            cutoff_date = now_ist() - timedelta(days=days_back)
+            
+            # Get location data for training (only the columns the trainers use)
+            locations_query = select(
+                Location.latitude,
+                Location.longitude,
+                func.coalesce(Location.speed, 0.0),
+                cast(func.extract("epoch", Location.timestamp), Float)
+            ).where(
+                Location.timestamp >= cutoff_date
+            ).order_by(Location.timestamp)
+            
+            # The request session is closed by the time this task runs, so use a
+            # task-scoped one, released before training starts. Server-side
+            # cursor: one partition of Row objects alive at a time, each packed
+            # into a compact numpy chunk
+            chunks = []
+            async with session_factory() as db:
+                locations_result = await db.stream(locations_query.execution_options(yield_per=TRAINING_FETCH_SIZE))
+                async for partition in locations_result.partitions():
+                    chunks.append(_to_training_array(partition))
+            training_data = np.concatenate(chunks) if chunks else np.empty(0, dtype=TRAINING_DTYPE)
+            
+            results = {}
+            
+            # Training is CPU-bound; run it in worker processes so the event loop
+            # (and every concurrent request) is not stalled by sklearn/torch fits
+            loop = asyncio.get_running_loop()
+            
+            # Retrain anomaly model
+            if "anomaly" in model_types:
+                anomaly_result = await loop.run_in_executor(_training_pool, train_anomaly_model_sync, training_data)
+                reload_anomaly_model()
+                results["anomaly"] = anomaly_result
+            
+            # Retrain sequence model
+            if "sequence" in model_types:
+                sequence_result = await loop.run_in_executor(_training_pool, train_sequence_model_sync, training_data)
+                reload_sequence_model()
+                results["sequence"] = sequence_result
+            
+            await invalidate_dashboard_cache()
+            
+            # Broadcast completion status
+            await websocket_manager.publish_alert("admin", {
+                "type": "retrain_complete",
+                "results": results,
+                "timestamp": ist_isoformat()
+            })
+            
+        except Exception as e:
+            # Broadcast error status
+            await websocket_manager.publish_alert("admin", {
+                "type": "retrain_error",
+                "error": str(e),
+                "timestamp": ist_isoformat()
+            })
 
 
 @router.get("/system/status")
@@ -83,36 +184,26 @@ async def get_system_status(
     db: AsyncSession = Depends(get_db)
 ):
     """Get comprehensive system status"""
-    # Database stats
-    tourists_count_query = select(func.count(Tourist.id))
-    tourists_result = await db.execute(tourists_count_query)
-    tourists_count = tourists_result.scalar()
-    
-    authorities_count_query = select(func.count(Authority.id))
-    authorities_result = await db.execute(authorities_count_query)
-    authorities_count = authorities_result.scalar()
+    # Dashboards poll this endpoint; serve the serialized body for a few seconds
+    cached = await get_cached_response(STATUS_KEY)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
     
-    # Active users in last 24 hours
-    cutoff_time = now_ist() - timedelta(hours=24)
-    active_tourists_query = select(func.count(Tourist.id)).where(
-        Tourist.last_seen >= cutoff_time
-    )
-    active_tourists_result = await db.execute(active_tourists_query)
-    active_tourists_count = active_tourists_result.scalar()
-    
-    # Recent alerts
-    recent_alerts_query = select(func.count(Alert.id)).where(
-        Alert.created_at >= cutoff_time
-    )
-    recent_alerts_result = await db.execute(recent_alerts_query)
-    recent_alerts_count = recent_alerts_result.scalar()
+    # Database stats: independent counts as scalar subqueries, one round trip
+    now = now_ist()
+    cutoff_time = now - timedelta(hours=24)
+    stats = (await db.execute(_STATUS_COUNTS, {"cutoff": cutoff_time})).one()
+    tourists_count = stats.tourists
+    authorities_count = stats.authorities
+    active_tourists_count = stats.active_tourists
+    recent_alerts_count = stats.recent_alerts
     
     # WebSocket connections
     websocket_stats = websocket_manager.get_channel_stats()
     
-    return {
+    payload = {
         "status": "ok",
-        "timestamp": ist_isoformat(),
+        "timestamp": now.isoformat(),
         "database": {
             "status": "connected",
             "tourists_total": tourists_count,
@@ -126,14 +217,15 @@ async def get_system_status(
             "ai_models": "loaded"
         }
     }
+    body = await cache_response(STATUS_KEY, payload)
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/system/retrain-model")
 async def retrain_system_models(
     payload: RetrainRequest,
     background_tasks: BackgroundTasks,
-    current_user: AuthUser = Depends(get_current_admin),
-    db: AsyncSession = Depends(get_db)
+    current_user: AuthUser = Depends(get_current_admin)
 ):
     """Trigger model retraining in the background"""
     # Validate model types
@@ -151,71 +243,141 @@ async def retrain_system_models(
         retrain_models_background,
         payload.model_types,
         payload.days_back,
-        db
+        AsyncSessionLocal
     )
     
     return {
         "status": "retrain_started",
         "model_types": payload.model_types,
         "days_back": payload.days_back,
-        "started_at": datetime.utcnow().isoformat(),
+        "started_at": ist_isoformat(),
         "started_by": current_user.id
     }
 
 
-@router.get("/users/list")
+def _encode_user_cursor(created_at: datetime, user_id: str) -> str:
+    """Opaque base64url keyset cursor for (created_at, id)"""
+    raw = orjson.dumps([created_at.isoformat(), user_id])
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _decode_user_cursor(cursor: str) -> tuple:
+    """(created_at, id) from a cursor made by _encode_user_cursor; 400 when malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, user_id = orjson.loads(raw)
+        return datetime.fromisoformat(created_at), str(uuid.UUID(user_id))
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _users_page_query(user_type: Optional[str], limit: int, cursor: Optional[str]):
+    """One page of users_unified, newest first, seeking past cursor when given"""
+    # Single query over the users_unified view, newest first across both kinds
+    # Explicit projection of the response fields; no password hashes or other
+    # wide columns cross the wire even if the view grows
+    u = users_unified.c
+    users_query = select(
+        u.id, u.kind, u.email, u.name, u.phone, u.is_active, u.created_at,
+        u.safety_score, u.last_seen, u.badge_number, u.department, u.rank
+    ).order_by(desc(u.created_at), desc(u.id)).limit(limit)
+    if user_type in ("tourist", "authority"):
+        users_query = users_query.where(u.kind == user_type)
+    if cursor is not None:
+        # Keyset: seek past the cursor on (created_at, id) instead of OFFSET
+        after_created, after_id = _decode_user_cursor(cursor)
+        users_query = users_query.where(tuple_(u.created_at, u.id) < tuple_(
+            bindparam("after_created", after_created, type_=u.created_at.type),
+            bindparam("after_id", after_id, type_=u.id.type),
+        ))
+    return users_query
+
+
+@router.get("/users/list", response_class=ORJSONResponse)
 async def list_users(
     user_type: Optional[str] = None,  # "tourist" or "authority"
     limit: int = 100,
+    cursor: Optional[str] = None,  # next_cursor from the previous page
     current_user: AuthUser = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get list of users"""
-    users = []
+    """Get list of users, newest first; pass next_cursor back for the following page"""
+    users_result = await db.execute(_users_page_query(user_type, limit, cursor))
     
-    if user_type != "authority":
-        # Get tourists
-        tourists_query = select(Tourist).order_by(desc(Tourist.created_at)).limit(limit)
-        tourists_result = await db.execute(tourists_query)
-        tourists = tourists_result.scalars().all()
-        
-        for tourist in tourists:
+    users = []
+    for user in users_result:
+        if user.kind == "tourist":
             users.append({
-                "id": tourist.id,
+                "id": user.id,
                 "type": "tourist",
-                "email": tourist.email,
-                "name": tourist.name,
-                "phone": tourist.phone,
-                "safety_score": tourist.safety_score,
-                "is_active": tourist.is_active,
-                "last_seen": tourist.last_seen.isoformat() if tourist.last_seen else None,
-                "created_at": tourist.created_at.isoformat()
+                "email": user.email,
+                "name": user.name,
+                "phone": user.phone,
+                "safety_score": user.safety_score,
+                "is_active": user.is_active,
+                "last_seen": user.last_seen,
+                "created_at": user.created_at
             })
-    
-    if user_type != "tourist":
-        # Get authorities
-        authorities_query = select(Authority).order_by(desc(Authority.created_at)).limit(limit)
-        authorities_result = await db.execute(authorities_query)
-        authorities = authorities_result.scalars().all()
-        
-        for authority in authorities:
+        else:
             users.append({
-                "id": authority.id,
+                "id": user.id,
                 "type": "authority",
-                "email": authority.email,
-                "name": authority.name,
-                "badge_number": authority.badge_number,
-                "department": authority.department,
-                "rank": authority.rank,
-                "is_active": authority.is_active,
-                "created_at": authority.created_at.isoformat()
+                "email": user.email,
+                "name": user.name,
+                "badge_number": user.badge_number,
+                "department": user.department,
+                "rank": user.rank,
+                "is_active": user.is_active,
+                "created_at": user.created_at
             })
     
-    return {
+    next_cursor = None
+    if len(users) == limit:
+        last = users[-1]
+        next_cursor = _encode_user_cursor(last["created_at"], last["id"])
+    
+    # Returned directly so orjson encodes the datetimes natively, skipping
+    # FastAPI's jsonable_encoder walk over every row
+    return ORJSONResponse({
         "users": users,
         "total": len(users),
-        "filter": user_type or "all"
-    }
+        "filter": user_type or "all",
+        "next_cursor": next_cursor
+    })
+
+
+# Single-column UPDATE ... RETURNING; updated_at is filled by the column's onupdate
+_SET_TOURIST_ACTIVE = update(Tourist).where(
+    Tourist.id == bindparam("user_id")
+).values(is_active=bindparam("active")).returning(Tourist.id)
+
+_SET_AUTHORITY_ACTIVE = update(Authority).where(
+    Authority.id == bindparam("user_id")
+).values(is_active=bindparam("active")).returning(Authority.id)
+
+
+async def _set_user_active(db: AsyncSession, user_id: str, is_active: bool) -> Optional[str]:
+    """Flip is_active with UPDATE ... RETURNING (no SELECT/hydrate); returns "tourist", "authority" or None"""
+    # Every user id is a UUID (tourists.id is a uuid column, authorities.id is
+    # held to one by ck_authorities_id_uuid), so anything else matches nobody
+    try:
+        user_id = str(uuid.UUID(user_id))
+    except ValueError:
+        return None
+    
+    result = await db.execute(_SET_TOURIST_ACTIVE, {"user_id": user_id, "active": is_active})
+    if result.scalar() is not None:
+        await db.commit()
+        await invalidate_user(user_id)
+        return "tourist"
+    
+    result = await db.execute(_SET_AUTHORITY_ACTIVE, {"user_id": user_id, "active": is_active})
+    if result.scalar() is not None:
+        await db.commit()
+        await invalidate_user(user_id)
+        return "authority"
+    
+    return None
 
 
 @router.put("/users/{user_id}/suspend")
@@ -226,40 +388,16 @@ async def suspend_user(
     db: AsyncSession = Depends(get_db)
 ):
     """Suspend a user (tourist or authority)"""
-    # Try to find as tourist first
-    tourist_query = select(Tourist).where(Tourist.id == user_id)
-    tourist_result = await db.execute(tourist_query)
-    tourist = tourist_result.scalar_one_or_none()
+    user_type = await _set_user_active(db, user_id, False)
     
-    if tourist:
-        tourist.is_active = False
-        await db.commit()
-        
+    if user_type:
         return {
             "id": user_id,
-            "type": "tourist",
+            "type": user_type,
             "status": "suspended",
             "reason": payload.reason,
             "suspended_by": current_user.id,
-            "suspended_at": datetime.utcnow().isoformat()
-        }
-    
-    # Try to find as authority
-    authority_query = select(Authority).where(Authority.id == user_id)
-    authority_result = await db.execute(authority_query)
-    authority = authority_result.scalar_one_or_none()
-    
-    if authority:
-        authority.is_active = False
-        await db.commit()
-        
-        return {
-            "id": user_id,
-            "type": "authority",
-            "status": "suspended",
-            "reason": payload.reason,
-            "suspended_by": current_user.id,
-            "suspended_at": datetime.utcnow().isoformat()
+            "suspended_at": ist_isoformat()
         }
     
     raise HTTPException(
@@ -275,25 +413,10 @@ async def activate_user(
     db: AsyncSession = Depends(get_db)
 ):
     """Reactivate a suspended user"""
-    # Try tourist first
-    tourist_query = select(Tourist).where(Tourist.id == user_id)
-    tourist_result = await db.execute(tourist_query)
-    tourist = tourist_result.scalar_one_or_none()
+    user_type = await _set_user_active(db, user_id, True)
     
-    if tourist:
-        tourist.is_active = True
-        await db.commit()
-        return {"id": user_id, "type": "tourist", "status": "activated"}
-    
-    # Try authority
-    authority_query = select(Authority).where(Authority.id == user_id)
-    authority_result = await db.execute(authority_query)
-    authority = authority_result.scalar_one_or_none()
-    
-    if authority:
-        authority.is_active = True
-        await db.commit()
-        return {"id": user_id, "type": "authority", "status": "activated"}
+    if user_type:
+        return {"id": user_id, "type": user_type, "status": "activated"}
     
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -308,41 +431,36 @@ async def get_analytics_dashboard(
     db: AsyncSession = Depends(get_db)
 ):
     """Get analytics dashboard data"""
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    cache_key = analytics_key(days)
+    cached = await get_cached_response(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
     
-    # Alert statistics
-    alerts_by_type_query = select(
-        Alert.type,
-        func.count(Alert.id).label("count")
-    ).where(
-        Alert.created_at >= cutoff_date
-    ).group_by(Alert.type)
+    # One clock read per request, shared by the cutoff and generated_at
+    now = now_ist()
+    cutoff_date = now - timedelta(days=days)
     
-    alerts_by_type_result = await db.execute(alerts_by_type_query)
-    alerts_by_type = {row.type.value: row.count for row in alerts_by_type_result}
+    # Alert statistics
+    alerts_by_type_result = await db.execute(_ALERTS_BY_TYPE, {"cutoff": cutoff_date})
+    alerts_by_type = {row.type: row.count for row in alerts_by_type_result}
     
     # Safety score distribution
-    safety_scores_query = select(Tourist.safety_score).where(
-        Tourist.is_active == True,
-        Tourist.safety_score.isnot(None)
-    )
+    stats = (await db.execute(_SAFETY_SCORE_STATS)).one()
     
-    safety_scores_result = await db.execute(safety_scores_query)
-    safety_scores = [row[0] for row in safety_scores_result]
-    
-    # Calculate distribution
     score_ranges = {
-        "critical": len([s for s in safety_scores if s < 40]),
-        "high_risk": len([s for s in safety_scores if 40 <= s < 60]),
-        "medium_risk": len([s for s in safety_scores if 60 <= s < 80]),
-        "low_risk": len([s for s in safety_scores if s >= 80])
+        "critical": stats.critical,
+        "high_risk": stats.high_risk,
+        "medium_risk": stats.medium_risk,
+        "low_risk": stats.low_risk
     }
     
-    return {
+    payload = {
         "period_days": days,
         "alerts_by_type": alerts_by_type,
         "safety_score_distribution": score_ranges,
-        "average_safety_score": sum(safety_scores) / len(safety_scores) if safety_scores else 0,
-        "total_active_tourists": len(safety_scores),
-        "generated_at": datetime.utcnow().isoformat()
+        "average_safety_score": float(stats.average) if stats.average is not None else 0,
+        "total_active_tourists": stats.total,
+        "generated_at": now.isoformat()
     }
+    body = await cache_response(cache_key, payload)
+    return Response(content=body, media_type="application/json")
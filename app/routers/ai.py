@@ -1,18 +1,67 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Union
+from bisect import bisect_left
+import math
+import numpy as np
 
-from ..utils.timezone import now_ist, ist_isoformat
-from ..auth.local_auth_utils import get_current_user, AuthUser
+from ..utils.request_time import request_timestamp
+from ..auth.local_auth_utils import get_current_user, get_current_admin, AuthUser
 from ..services.geofence import check_point, get_nearby_zones
 from ..services.anomaly import score_point
-from ..services.sequence import score_sequence
+from ..services.sequence import score_sequence_arrays
 from ..services.scoring import compute_safety_score, get_risk_level
+from ..models.model_registry import model_files_present, refresh_model_files
 from ..config import get_settings
 
 settings = get_settings()
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+_RISK_THRESHOLDS = (0.4, 0.7)
+_RISK_LEVELS = ("low", "medium", "high")
+
+
+# Baseline severity_probabilities; the predicted label's entry is replaced per call
+_SEVERITY_PROBABILITIES = {"low": 0.1, "medium": 0.2, "high": 0.3, "critical": 0.4}
+
+
+def _classify_score(safety_score: float) -> tuple:
+    """(label, confidence) ladder over safety_score buckets of width 20"""
+    if safety_score < 20:
+        return "critical", 0.9
+    elif safety_score < 40:
+        return "high", 0.85
+    elif safety_score < 60:
+        return "medium", 0.75
+    elif safety_score < 80:
+        return "low", 0.70
+    return "low", 0.65
+
+
+# The ladder evaluated once for every score in 0..100; thresholds are integers,
+# so flooring a fractional score selects the same rung
+_CLASSIFY_BY_SCORE = tuple(_classify_score(score) for score in range(101))
+_CLASSIFY_BY_ALERT_TYPE = {
+    "sos": ("critical", 1.0),
+    "panic": ("high", 0.95),
+}
+
+
+def _classify(alert_type: str, safety_score: float) -> tuple:
+    """(label, confidence) for an alert; SOS/panic override the score ladder"""
+    by_type = _CLASSIFY_BY_ALERT_TYPE.get(alert_type)
+    if by_type is not None:
+        return by_type
+    if not math.isfinite(safety_score):
+        # NaN/inf can't index the table; the ladder itself handles them as before
+        return _classify_score(safety_score)
+    return _CLASSIFY_BY_SCORE[min(100, max(0, math.floor(safety_score)))]
+
+
+def _risk_level(score: float) -> str:
+    """Anomaly score -> low (<=0.4) / medium (<=0.7) / high"""
+    return _RISK_LEVELS[bisect_left(_RISK_THRESHOLDS, score)]
 
 
 class GeoFenceCheck(BaseModel):
@@ -39,6 +88,13 @@ class SafetyScoreRequest(BaseModel):
     manual_adjustment: float = 0
 
 
+class AlertClassifyRequest(BaseModel):
+    safety_score: Union[int, float] = 50
+    alert_type: str = "unknown"
+    location_data: Dict[str, Any] = {}
+    context: Dict[str, Any] = {}
+
+
 @router.post("/ai/geofence/check")
 async def ai_geofence_check(
     payload: GeoFenceCheck,
@@ -79,7 +135,8 @@ async def ai_geofence_nearby(
 @router.post("/ai/anomaly/point")
 async def ai_anomaly_point(
     payload: AnomalyPoint,
-    current_user: AuthUser = Depends(get_current_user)
+    current_user: AuthUser = Depends(get_current_user),
+    ts: str = Depends(request_timestamp)
 ):
     """Score single location point for anomaly detection"""
     try:
@@ -88,16 +145,16 @@ async def ai_anomaly_point(
             "latitude": payload.lat,
             "longitude": payload.lon,
             "speed": payload.speed or 0,
-            "timestamp": payload.timestamp or ist_isoformat()
+            "timestamp": payload.timestamp or ts
         }
         
         score = await score_point(location_data)
         
         return {
             "anomaly_score": score,
-            "risk_level": "high" if score > 0.7 else "medium" if score > 0.4 else "low",
+            "risk_level": _risk_level(score),
             "location": {"lat": payload.lat, "lon": payload.lon},
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": ts
         }
     except Exception as e:
         raise HTTPException(
@@ -109,29 +166,28 @@ async def ai_anomaly_point(
 @router.post("/ai/anomaly/sequence")
 async def ai_anomaly_sequence(
     payload: SequenceSample,
-    current_user: AuthUser = Depends(get_current_user)
+    current_user: AuthUser = Depends(get_current_user),
+    ts: str = Depends(request_timestamp)
 ):
     """Score sequence of location points for anomaly detection"""
     try:
-        # Convert points to required format
-        points_data = [
-            {
-                "latitude": point.lat,
-                "longitude": point.lon,
-                "speed": point.speed or 0,
-                "timestamp": point.timestamp or datetime.utcnow().isoformat()
-            }
-            for point in payload.points
-        ]
+        # Column arrays (lat/lon/speed) instead of one dict per point
+        points = payload.points
+        n = len(points)
+        lats = np.fromiter((p.lat for p in points), dtype=np.float64, count=n)
+        lons = np.fromiter((p.lon for p in points), dtype=np.float64, count=n)
+        speeds = np.fromiter((p.speed or 0 for p in points), dtype=np.float64, count=n)
+        timestamps = [p.timestamp or ts for p in points]
         
-        score = await score_sequence(points_data)
+        score = await score_sequence_arrays(lats, lons, speeds, timestamps)
         
-        return {
+        # Returned directly: orjson encodes it without the jsonable_encoder pass
+        return ORJSONResponse({
             "sequence_anomaly_score": score,
-            "risk_level": "high" if score > 0.7 else "medium" if score > 0.4 else "low",
-            "sequence_length": len(payload.points),
-            "timestamp": datetime.utcnow().isoformat()
-        }
+            "risk_level": _risk_level(score),
+            "sequence_length": n,
+            "timestamp": ts
+        })
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -142,7 +198,8 @@ async def ai_anomaly_sequence(
 @router.post("/ai/score/compute")
 async def ai_score_compute(
     payload: SafetyScoreRequest,
-    current_user: AuthUser = Depends(get_current_user)
+    current_user: AuthUser = Depends(get_current_user),
+    ts: str = Depends(request_timestamp)
 ):
     """Compute comprehensive safety score"""
     try:
@@ -154,14 +211,15 @@ async def ai_score_compute(
             "current_location_data": payload.current_location_data or {
                 "latitude": payload.lat,
                 "longitude": payload.lon,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": ts
             },
             "manual_adjustment": payload.manual_adjustment
         }
         
         safety_score = await compute_safety_score(context)
         
-        return {
+        # Returned directly: orjson encodes it without the jsonable_encoder pass
+        return ORJSONResponse({
             "safety_score": safety_score,
             "risk_level": get_risk_level(safety_score),
             "components": {
@@ -171,8 +229,8 @@ async def ai_score_compute(
                 "manual_adjustment": payload.manual_adjustment
             },
             "location": {"lat": payload.lat, "lon": payload.lon},
-            "timestamp": datetime.utcnow().isoformat()
-        }
+            "timestamp": ts
+        })
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -182,8 +240,9 @@ async def ai_score_compute(
 
 @router.post("/ai/classify/alert")
 async def ai_classify_alert(
-    payload: Dict[str, Any],
-    current_user: AuthUser = Depends(get_current_user)
+    payload: AlertClassifyRequest,
+    current_user: AuthUser = Depends(get_current_user),
+    ts: str = Depends(request_timestamp)
 ):
     """
     Classify alert severity using rule-based system.
@@ -191,34 +250,13 @@ async def ai_classify_alert(
     Uses safety scores, alert types, and context to determine severity.
     """
     try:
-        # Extract features from payload
-        safety_score = payload.get("safety_score", 50)
-        alert_type = payload.get("alert_type", "unknown")
-        location_data = payload.get("location_data", {})
-        context = payload.get("context", {})
+        safety_score = payload.safety_score
+        alert_type = payload.alert_type
+        location_data = payload.location_data
+        context = payload.context
         
-        # Rule-based severity classification
-        if alert_type == "sos":
-            label = "critical"
-            confidence = 1.0
-        elif alert_type == "panic":
-            label = "high"
-            confidence = 0.95
-        elif safety_score < 20:
-            label = "critical"
-            confidence = 0.9
-        elif safety_score < 40:
-            label = "high"
-            confidence = 0.85
-        elif safety_score < 60:
-            label = "medium"
-            confidence = 0.75
-        elif safety_score < 80:
-            label = "low"
-            confidence = 0.70
-        else:
-            label = "low"
-            confidence = 0.65
+        # Rule-based severity classification (precomputed tables)
+        label, confidence = _classify(alert_type, safety_score)
         
         # Context-based adjustments
         if context.get("time_of_day") == "night" and label == "medium":
@@ -228,15 +266,13 @@ async def ai_classify_alert(
         if context.get("tourist_history") == "new_user" and label == "high":
             confidence = min(confidence + 0.05, 1.0)
         
+        probabilities = dict(_SEVERITY_PROBABILITIES)
+        probabilities[label] = 1.0 - confidence
+        
         return {
             "predicted_severity": label,
             "confidence": confidence,
-            "severity_probabilities": {
-                "low": 1.0 - confidence if label == "low" else 0.1,
-                "medium": 1.0 - confidence if label == "medium" else 0.2,
-                "high": 1.0 - confidence if label == "high" else 0.3,
-                "critical": 1.0 - confidence if label == "critical" else 0.4
-            },
+            "severity_probabilities": probabilities,
             "reasoning": _get_classification_reasoning(alert_type, safety_score, label),
             "features_used": {
                 "safety_score": safety_score,
@@ -244,7 +280,7 @@ async def ai_classify_alert(
                 "has_location": bool(location_data),
                 "context": context
             },
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": ts
         }
     except Exception as e:
         raise HTTPException(
@@ -272,15 +308,14 @@ def _get_classification_reasoning(alert_type: str, safety_score: int, label: str
 
 @router.get("/ai/models/status")
 async def ai_models_status(
-    current_user: AuthUser = Depends(get_current_user)
+    current_user: AuthUser = Depends(get_current_user),
+    ts: str = Depends(request_timestamp)
 ):
     """Get status of all AI models and services"""
-    import os
-    
-    # Check if model files exist
-    models_dir = settings.models_dir
-    isolation_forest_exists = os.path.exists(f"{models_dir}/isolation_forest.pkl")
-    lstm_exists = os.path.exists(f"{models_dir}/lstm_autoencoder.pth")
+    # Model file presence is stat'ed at startup and after retraining
+    model_files = model_files_present()
+    isolation_forest_exists = model_files["isolation_forest"]
+    lstm_exists = model_files["lstm_autoencoder"]
     
     return {
         "models": {
@@ -307,5 +342,17 @@ async def ai_models_status(
                 "components": ["geofence", "anomaly", "sequence"]
             }
         },
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": ts
+    }
+
+
+@router.post("/ai/models/status/refresh")
+async def ai_models_status_refresh(
+    current_user: AuthUser = Depends(get_current_admin),
+    ts: str = Depends(request_timestamp)
+):
+    """Re-check which model files exist on disk"""
+    return {
+        "model_files": refresh_model_files(),
+        "timestamp": ts
     }
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, status
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Response, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+import asyncio
+import uuid
 from datetime import datetime, timedelta, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, func, and_
+from sqlalchemy import select, update, desc, func, and_, case, cast, literal, bindparam, Text
+from sqlalchemy.dialects.postgresql import insert as pg_insert, aggregate_order_by
 
-from ..database import get_db
+from ..database import get_db, AsyncSessionLocal
 from ..utils.timezone import now_ist, ist_isoformat, ensure_ist
 from ..auth.local_auth_utils import (
     authenticate_user, create_user_account, get_current_authority, AuthUser
@@ -14,12 +18,78 @@ from ..models.database_models import (
     Tourist, Location, Alert, RestrictedZone, Authority, Incident, EFIR,
     AlertType, AlertSeverity, ZoneType, Trip, TripStatus
 )
-from ..services.websocket_manager import websocket_manager
+from ..services.websocket_manager import websocket_manager, zone_topic
 from ..services.geofence import create_zone, get_all_zones, delete_zone
+from ..services.dashboard_cache import (
+    ACTIVE_TOURISTS_KEY, ACTIVE_TOURISTS_TTL, ZONES_KEY, ZONES_TTL,
+    get_cached_response, cache_response, cache_body, invalidate_cached_response
+)
 from ..services.blockchain import generate_efir
 
 router = APIRouter()
 
+# /tourists/active: Postgres builds the whole JSON array, ordered by last_seen
+# (most recent first, nulls last); "recently active" means seen since :cutoff
+_recently_active = func.coalesce(Tourist.last_seen >= bindparam("cutoff"), False)
+_ACTIVE_TOURISTS_JSON = select(
+    cast(func.json_agg(aggregate_order_by(
+        func.json_build_object(
+            "id", Tourist.id,
+            "name", func.coalesce(Tourist.name, Tourist.email),
+            "email", Tourist.email,
+            "safety_score", func.coalesce(Tourist.safety_score, literal(100.0)),
+            "last_location", case(
+                (and_(Tourist.last_location_lat != 0, Tourist.last_location_lon != 0),
+                 func.json_build_object("lat", Tourist.last_location_lat, "lon", Tourist.last_location_lon)),
+                else_=None
+            ),
+            "last_seen", Tourist.last_seen,
+            "is_active", _recently_active,
+            "status", case((_recently_active, "online"), else_="offline")
+        ),
+        Tourist.last_seen.desc().nullslast()
+    )), Text)
+)
+
+# /alerts/recent: projected columns only, built once so each call reuses the cached compilation
+_RECENT_ALERTS = select(
+    Alert.id,
+    Alert.tourist_id,
+    Alert.type,
+    Alert.severity,
+    Alert.title,
+    Alert.description,
+    Alert.is_acknowledged,
+    Alert.is_resolved,
+    Alert.created_at,
+    Tourist.name.label("tourist_name"),
+    Tourist.email.label("tourist_email"),
+).join(
+    Tourist, Alert.tourist_id == Tourist.id
+).where(
+    Alert.created_at >= bindparam("cutoff")
+).order_by(desc(Alert.created_at))
+
+# /incident/close: close the incident and resolve its alert in one statement.
+# The alert UPDATE ... FROM joins the incident CTE, so it only runs when the incident exists.
+_closed_incident = update(Incident).where(
+    Incident.alert_id == bindparam("close_alert_id")
+).values(
+    status="closed",
+    resolution_notes=func.coalesce(bindparam("notes", type_=Text), Incident.resolution_notes),
+    updated_at=func.now()
+).returning(Incident.incident_number, Incident.alert_id).cte("closed_incident")
+
+_resolved_alert = update(Alert).where(
+    Alert.id == _closed_incident.c.alert_id
+).values(
+    is_resolved=True,
+    resolved_by=bindparam("resolved_by_id"),
+    resolved_at=bindparam("closed_at")
+).returning(Alert.id).cte("resolved_alert")
+
+_CLOSE_INCIDENT = select(_closed_incident.c.incident_number).add_cte(_closed_incident, _resolved_alert)
+
 
 class AuthorityRegisterRequest(BaseModel):
     email: str
@@ -64,6 +134,7 @@ async def register_authority(
     try:
         # Create authority account with all fields
         auth_response = await create_user_account(
+            db,
             email=payload.email,
             password=payload.password,
             role="authority",
@@ -91,10 +162,10 @@ async def register_authority(
 
 
 @router.post("/auth/login-authority")
-async def login_authority(payload: LoginRequest):
+async def login_authority(payload: LoginRequest, db: AsyncSession = Depends(get_db)):
     """Login authority user"""
     try:
-        auth_response = await authenticate_user(payload.email, payload.password, role="authority")
+        auth_response = await authenticate_user(db, payload.email, payload.password, role="authority")
         return {
             "access_token": auth_response["access_token"],
             "token_type": "bearer",
@@ -115,86 +186,94 @@ async def get_active_tourists(
     db: AsyncSession = Depends(get_db)
 ):
     """Get list of all tourists (shows all registered tourists regardless of activity status)"""
-    from datetime import timezone
+    # Every authority dashboard polls this; serve the serialized list from Redis between refreshes
+    cached = await get_cached_response(ACTIVE_TOURISTS_KEY)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
     
-    # Get all tourists, ordered by last_seen (most recent first, nulls last)
-    query = select(Tourist).order_by(
-        Tourist.last_seen.desc().nullslast()
-    )
-    
-    result = await db.execute(query)
-    tourists = result.scalars().all()
-    
-    # Calculate activity status for each tourist (use timezone-aware datetime)
+    # Activity status: seen in the last 24 hours (timezone-aware cutoff)
     cutoff_time = datetime.now(timezone.utc) - timedelta(hours=24)
     
-    tourist_list = []
-    for tourist in tourists:
-        # Determine if tourist is currently active (seen in last 24 hours)
-        is_recently_active = bool(tourist.last_seen and tourist.last_seen >= cutoff_time)
-        
-        tourist_list.append({
-            "id": tourist.id,
-            "name": tourist.name or tourist.email,
-            "email": tourist.email,
-            "safety_score": tourist.safety_score if tourist.safety_score is not None else 100.0,
-            "last_location": {
-                "lat": tourist.last_location_lat,
-                "lon": tourist.last_location_lon
-            } if tourist.last_location_lat and tourist.last_location_lon else None,
-            "last_seen": tourist.last_seen.isoformat() if tourist.last_seen else None,
-            "is_active": is_recently_active,
-            "status": "online" if is_recently_active else "offline"
-        })
+    # The array arrives as one JSON text value; no per-tourist Python work
+    tourists_json = (await db.execute(_ACTIVE_TOURISTS_JSON, {"cutoff": cutoff_time})).scalar()
     
-    return tourist_list
+    body = await cache_body(ACTIVE_TOURISTS_KEY, (tourists_json or "[]").encode(), ttl=ACTIVE_TOURISTS_TTL)
+    return Response(content=body, media_type="application/json")
 
 
-@router.get("/tourist/{tourist_id}/track")
-async def track_tourist(
-    tourist_id: str,
-    current_user: Authority = Depends(get_current_authority),
-    db: AsyncSession = Depends(get_db)
-):
-    """Get detailed tracking information for a specific tourist"""
-    # Get tourist info
-    tourist_query = select(Tourist).where(Tourist.id == tourist_id)
-    tourist_result = await db.execute(tourist_query)
-    tourist = tourist_result.scalar_one_or_none()
-    
-    if not tourist:
+def _tourist_path_id(tourist_id: str) -> str:
+    """Path tourist_id as a canonical uuid string; tourists.id is a uuid column, so anything else is a 404"""
+    try:
+        return str(uuid.UUID(tourist_id))
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tourist not found"
         )
+
+
+async def _fetch_rows(stmt) -> List[Any]:
+    """Run one read on its own pooled session, so independent reads can overlap"""
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(stmt)).all()
+
+
+@router.get("/tourist/{tourist_id}/track", response_class=ORJSONResponse)
+async def track_tourist(
+    tourist_id: str = Depends(_tourist_path_id),
+    current_user: Authority = Depends(get_current_authority)
+):
+    """Get detailed tracking information for a specific tourist"""
+    # Get tourist info
+    tourist_query = select(
+        Tourist.id, Tourist.name, Tourist.email, Tourist.phone,
+        Tourist.safety_score, Tourist.last_seen
+    ).where(Tourist.id == tourist_id)
     
     # Get recent locations (last 6 hours)
     cutoff_time = now_ist() - timedelta(hours=6)
-    locations_query = select(Location).where(
+    locations_query = select(
+        Location.id, Location.latitude, Location.longitude,
+        Location.speed, Location.altitude, Location.timestamp
+    ).where(
         Location.tourist_id == tourist_id,
         Location.timestamp >= cutoff_time
     ).order_by(desc(Location.timestamp)).limit(50)
     
-    locations_result = await db.execute(locations_query)
-    locations = locations_result.scalars().all()
-    
     # Get recent alerts
-    alerts_query = select(Alert).where(
+    alerts_query = select(
+        Alert.id, Alert.type, Alert.severity, Alert.title,
+        Alert.description, Alert.is_acknowledged, Alert.created_at
+    ).where(
         Alert.tourist_id == tourist_id,
         Alert.created_at >= cutoff_time
     ).order_by(desc(Alert.created_at))
     
-    alerts_result = await db.execute(alerts_query)
-    alerts = alerts_result.scalars().all()
+    # The three reads are independent; a single session would serialize them
+    # on one connection, so each gets its own and they run concurrently
+    tourist_rows, locations, alerts = await asyncio.gather(
+        _fetch_rows(tourist_query),
+        _fetch_rows(locations_query),
+        _fetch_rows(alerts_query)
+    )
     
-    return {
+    if not tourist_rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tourist not found"
+        )
+    tourist = tourist_rows[0]
+    
+    # Returned directly so orjson encodes the datetimes natively, skipping
+    # FastAPI's jsonable_encoder walk over every row
+    return ORJSONResponse({
         "tourist": {
             "id": tourist.id,
             "name": tourist.name or tourist.email,
             "email": tourist.email,
             "phone": tourist.phone,
             "safety_score": tourist.safety_score,
-            "last_seen": tourist.last_seen.isoformat() if tourist.last_seen else None
+            "last_seen": tourist.last_seen
         },
         "locations": [
             {
@@ -203,61 +282,64 @@ async def track_tourist(
                 "lon": loc.longitude,
                 "speed": loc.speed,
                 "altitude": loc.altitude,
-                "timestamp": loc.timestamp.isoformat()
+                "timestamp": loc.timestamp
             }
             for loc in locations
         ],
         "recent_alerts": [
             {
                 "id": alert.id,
-                "type": alert.type.value,
+                "type": alert.type,
                 "severity": alert.severity.value,
                 "title": alert.title,
                 "description": alert.description,
                 "is_acknowledged": alert.is_acknowledged,
-                "created_at": alert.created_at.isoformat()
+                "created_at": alert.created_at
             }
             for alert in alerts
         ]
-    }
+    })
 
 
-@router.get("/tourist/{tourist_id}/alerts")
+@router.get("/tourist/{tourist_id}/alerts", response_class=ORJSONResponse)
 async def get_tourist_alerts(
-    tourist_id: str,
+    tourist_id: str = Depends(_tourist_path_id),
     current_user: Authority = Depends(get_current_authority),
     db: AsyncSession = Depends(get_db)
 ):
     """Get all alerts for a specific tourist"""
-    query = select(Alert).where(
+    query = select(
+        Alert.id, Alert.tourist_id, Alert.type, Alert.severity, Alert.title,
+        Alert.description, Alert.is_acknowledged, Alert.acknowledged_by,
+        Alert.acknowledged_at, Alert.is_resolved, Alert.resolved_at, Alert.created_at
+    ).where(
         Alert.tourist_id == tourist_id
     ).order_by(desc(Alert.created_at))
     
     result = await db.execute(query)
-    alerts = result.scalars().all()
     
-    return [
+    return ORJSONResponse([
         {
             "id": alert.id,
             "tourist_id": alert.tourist_id,
-            "type": alert.type.value,
+            "type": alert.type,
             "severity": alert.severity.value,
             "title": alert.title,
             "description": alert.description,
             "is_acknowledged": alert.is_acknowledged,
             "acknowledged_by": alert.acknowledged_by,
-            "acknowledged_at": alert.acknowledged_at.isoformat() if alert.acknowledged_at else None,
+            "acknowledged_at": alert.acknowledged_at,
             "is_resolved": alert.is_resolved,
-            "resolved_at": alert.resolved_at.isoformat() if alert.resolved_at else None,
-            "created_at": alert.created_at.isoformat()
+            "resolved_at": alert.resolved_at,
+            "created_at": alert.created_at
         }
-        for alert in alerts
-    ]
+        for alert in result
+    ])
 
 
 @router.get("/tourist/{tourist_id}/profile")
 async def get_tourist_profile(
-    tourist_id: str,
+    tourist_id: str = Depends(_tourist_path_id),
     current_user: Authority = Depends(get_current_authority),
     db: AsyncSession = Depends(get_db)
 ):
@@ -336,7 +418,7 @@ async def get_tourist_profile(
 
 @router.get("/tourist/{tourist_id}/location/current")
 async def get_tourist_current_location(
-    tourist_id: str,
+    tourist_id: str = Depends(_tourist_path_id),
     current_user: Authority = Depends(get_current_authority),
     db: AsyncSession = Depends(get_db)
 ):
@@ -401,9 +483,9 @@ async def get_tourist_current_location(
     }
 
 
-@router.get("/tourist/{tourist_id}/location/history")
+@router.get("/tourist/{tourist_id}/location/history", response_class=ORJSONResponse)
 async def get_tourist_location_history(
-    tourist_id: str,
+    tourist_id: str = Depends(_tourist_path_id),
     hours_back: int = 24,
     limit: int = 100,
     include_trip_info: bool = False,
@@ -412,9 +494,9 @@ async def get_tourist_location_history(
 ):
     """Get tourist's location history with comprehensive filtering options"""
     # Verify tourist exists
-    tourist_query = select(Tourist).where(Tourist.id == tourist_id)
+    tourist_query = select(Tourist.name, Tourist.email).where(Tourist.id == tourist_id)
     tourist_result = await db.execute(tourist_query)
-    tourist = tourist_result.scalar_one_or_none()
+    tourist = tourist_result.one_or_none()
     
     if not tourist:
         raise HTTPException(
@@ -427,7 +509,11 @@ async def get_tourist_location_history(
     
     # Build query
     if include_trip_info:
-        locations_query = select(Location, Trip).outerjoin(
+        locations_query = select(
+            Location.id, Location.latitude, Location.longitude, Location.altitude,
+            Location.speed, Location.accuracy, Location.timestamp,
+            Trip.id.label("trip_id"), Trip.destination, Trip.status
+        ).outerjoin(
             Trip, Location.trip_id == Trip.id
         ).where(
             Location.tourist_id == tourist_id,
@@ -435,10 +521,9 @@ async def get_tourist_location_history(
         ).order_by(desc(Location.timestamp)).limit(limit)
         
         locations_result = await db.execute(locations_query)
-        locations_data = locations_result.all()
         
         locations_list = []
-        for location, trip in locations_data:
+        for location in locations_result:
             loc_data = {
                 "id": location.id,
                 "latitude": location.latitude,
@@ -446,22 +531,24 @@ async def get_tourist_location_history(
                 "altitude": location.altitude,
                 "speed": location.speed,
                 "accuracy": location.accuracy,
-                "timestamp": location.timestamp.isoformat(),
+                "timestamp": location.timestamp,
                 "trip": {
-                    "id": trip.id,
-                    "destination": trip.destination,
-                    "status": trip.status.value
-                } if trip else None
+                    "id": location.trip_id,
+                    "destination": location.destination,
+                    "status": location.status.value
+                } if location.trip_id is not None else None
             }
             locations_list.append(loc_data)
     else:
-        locations_query = select(Location).where(
+        locations_query = select(
+            Location.id, Location.latitude, Location.longitude, Location.altitude,
+            Location.speed, Location.accuracy, Location.timestamp
+        ).where(
             Location.tourist_id == tourist_id,
             Location.timestamp >= time_threshold
         ).order_by(desc(Location.timestamp)).limit(limit)
         
         locations_result = await db.execute(locations_query)
-        locations = locations_result.scalars().all()
         
         locations_list = [
             {
@@ -471,9 +558,9 @@ async def get_tourist_location_history(
                 "altitude": loc.altitude,
                 "speed": loc.speed,
                 "accuracy": loc.accuracy,
-                "timestamp": loc.timestamp.isoformat()
+                "timestamp": loc.timestamp
             }
-            for loc in locations
+            for loc in locations_result
         ]
     
     # Calculate movement statistics
@@ -487,7 +574,9 @@ async def get_tourist_location_history(
             lon2 = locations_list[i + 1]["longitude"]
             total_distance += _haversine_distance(lat1, lon1, lat2, lon2)
     
-    return {
+    # Returned directly so orjson encodes the datetimes natively, skipping
+    # FastAPI's jsonable_encoder walk over every point
+    return ORJSONResponse({
         "tourist_id": tourist_id,
         "tourist_name": tourist.name or tourist.email,
         "filter": {
@@ -503,12 +592,12 @@ async def get_tourist_location_history(
             "distance_traveled_km": round(total_distance / 1000, 2),
             "time_span_hours": hours_back
         }
-    }
+    })
 
 
 @router.get("/tourist/{tourist_id}/movement-analysis")
 async def get_tourist_movement_analysis(
-    tourist_id: str,
+    tourist_id: str = Depends(_tourist_path_id),
     hours_back: int = 24,
     current_user: Authority = Depends(get_current_authority),
     db: AsyncSession = Depends(get_db)
@@ -610,7 +699,7 @@ async def get_tourist_movement_analysis(
 
 @router.get("/tourist/{tourist_id}/safety-timeline")
 async def get_tourist_safety_timeline(
-    tourist_id: str,
+    tourist_id: str = Depends(_tourist_path_id),
     hours_back: int = 24,
     current_user: Authority = Depends(get_current_authority),
     db: AsyncSession = Depends(get_db)
@@ -654,7 +743,7 @@ async def get_tourist_safety_timeline(
         timeline.append({
             "timestamp": alert.created_at.isoformat(),
             "type": "alert",
-            "event": alert.type.value,
+            "event": alert.type,
             "severity": alert.severity.value,
             "title": alert.title,
             "description": alert.description,
@@ -705,7 +794,7 @@ async def get_tourist_safety_timeline(
 
 @router.get("/tourist/{tourist_id}/emergency-contacts")
 async def get_tourist_emergency_contacts(
-    tourist_id: str,
+    tourist_id: str = Depends(_tourist_path_id),
     current_user: Authority = Depends(get_current_authority),
     db: AsyncSession = Depends(get_db)
 ):
@@ -739,7 +828,7 @@ async def get_tourist_emergency_contacts(
     }
 
 
-@router.get("/alerts/recent")
+@router.get("/alerts/recent", response_class=ORJSONResponse)
 async def get_recent_alerts(
     hours: int = 24,
     current_user: Authority = Depends(get_current_authority),
@@ -748,39 +837,32 @@ async def get_recent_alerts(
     """Get recent alerts across all tourists"""
     cutoff_time = datetime.utcnow() - timedelta(hours=hours)
     
-    query = select(Alert, Tourist).join(
-        Tourist, Alert.tourist_id == Tourist.id
-    ).where(
-        Alert.created_at >= cutoff_time
-    ).order_by(desc(Alert.created_at))
-    
-    result = await db.execute(query)
-    alert_tourist_pairs = result.all()
+    result = await db.execute(_RECENT_ALERTS, {"cutoff": cutoff_time})
     
-    return [
+    return ORJSONResponse([
         {
-            "id": alert.id,
-            "tourist_id": alert.tourist_id,
+            "id": row.id,
+            "tourist_id": row.tourist_id,
             "tourist": {
-                "id": tourist.id,
-                "name": tourist.name or tourist.email,
-                "email": tourist.email
+                "id": row.tourist_id,
+                "name": row.tourist_name or row.tourist_email,
+                "email": row.tourist_email
             },
-            "type": alert.type.value,
-            "severity": alert.severity.value,
-            "title": alert.title,
-            "description": alert.description,
-            "is_acknowledged": alert.is_acknowledged,
-            "is_resolved": alert.is_resolved,
-            "created_at": alert.created_at.isoformat()
+            "type": row.type,
+            "severity": row.severity.value,
+            "title": row.title,
+            "description": row.description,
+            "is_acknowledged": row.is_acknowledged,
+            "is_resolved": row.is_resolved,
+            "created_at": row.created_at
         }
-        for alert, tourist in alert_tourist_pairs
-    ]
+        for row in result
+    ])
 
 
 @router.websocket("/alerts/subscribe")
-async def alerts_subscribe(websocket: WebSocket, token: str):
-    """Subscribe to real-time alerts via WebSocket"""
+async def alerts_subscribe(websocket: WebSocket, token: str, zones: Optional[str] = None):
+    """Subscribe to real-time alerts via WebSocket (zones: comma-separated zone ids to limit alerts to)"""
     try:
         # Manually verify JWT token (dependency injection doesn't work well with WebSockets)
         from ..auth.local_auth import local_auth
@@ -822,25 +904,27 @@ async def alerts_subscribe(websocket: WebSocket, token: str):
                     await websocket.close(code=1008, reason="Authority not found")
                     return
             # Admin users don't need to be in Authority table
-            
-            user_data = {
-                "user_id": user_id,
-                "email": email,
-                "role": role
-            }
-            
-            # Let websocket_manager handle the accept and connection management
-            await websocket_manager.connect(websocket, "authority", user_data)
-            
-            # Keep connection alive
-            while True:
-                # Receive heartbeat or other messages
-                data = await websocket.receive_text()
-                
-                # Echo heartbeat back
-                if data == "ping":
-                    await websocket.send_text("pong")
-                
+        
+        user_data = {
+            "user_id": user_id,
+            "email": email,
+            "role": role
+        }
+        
+        # Alerts are routed per zone topic; without zones the socket gets everything
+        try:
+            topics = [zone_topic(int(z)) for z in zones.split(",") if z.strip()] if zones else None
+        except ValueError:
+            await websocket.close(code=1008, reason="Invalid zones parameter")
+            return
+        
+        # Let websocket_manager handle the accept and connection management
+        await websocket_manager.connect(websocket, "authority", user_data, topics=topics)
+        
+        # Keep connection alive until the client leaves; uvicorn's protocol-level
+        # ping frames detect dead peers, and text "ping" heartbeats still get "pong"
+        await websocket_manager.wait_disconnect(websocket)
+        
     except WebSocketDisconnect:
         websocket_manager.disconnect(websocket)
 
@@ -852,54 +936,50 @@ async def acknowledge_incident(
     db: AsyncSession = Depends(get_db)
 ):
     """Acknowledge an incident/alert"""
-    # Get the alert
-    alert_query = select(Alert).where(Alert.id == payload.alert_id)
-    alert_result = await db.execute(alert_query)
-    alert = alert_result.scalar_one_or_none()
+    now = now_ist()
     
-    if not alert:
+    # Update alert acknowledgment; no row back means the alert doesn't exist
+    acknowledged_at = (await db.execute(
+        update(Alert)
+        .where(Alert.id == payload.alert_id)
+        .values(is_acknowledged=True, acknowledged_by=current_user.id, acknowledged_at=now)
+        .returning(Alert.acknowledged_at)
+    )).scalar_one_or_none()
+    
+    if acknowledged_at is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Alert not found"
         )
     
-    # Update alert acknowledgment
-    alert.is_acknowledged = True
-    alert.acknowledged_by = current_user.id
-    alert.acknowledged_at = now_ist()
-    
-    # Create or update incident record
-    incident_query = select(Incident).where(Incident.alert_id == payload.alert_id)
-    incident_result = await db.execute(incident_query)
-    incident = incident_result.scalar_one_or_none()
-    
-    if not incident:
-        # Generate incident number
-        ist_now = now_ist()
-        incident_number = f"INC-{ist_now.strftime('%Y%m%d')}-{payload.alert_id:06d}"
-        
-        incident = Incident(
-            alert_id=payload.alert_id,
-            incident_number=incident_number,
-            assigned_to=current_user.id,
-            response_time=now_ist()
-        )
-        db.add(incident)
-    else:
-        incident.assigned_to = current_user.id
-        incident.response_time = now_ist()
-    
-    if payload.notes:
-        incident.resolution_notes = payload.notes
+    # Create or update the incident record in one statement (ux_incidents_alert_id)
+    incident_number = f"INC-{now.strftime('%Y%m%d')}-{payload.alert_id:06d}"
+    upsert = pg_insert(Incident).values(
+        alert_id=payload.alert_id,
+        incident_number=incident_number,
+        assigned_to=current_user.id,
+        response_time=now,
+        resolution_notes=payload.notes or None
+    )
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[Incident.alert_id],
+        set_={
+            "assigned_to": current_user.id,
+            "response_time": now,
+            "resolution_notes": func.coalesce(upsert.excluded.resolution_notes, Incident.resolution_notes),
+            "updated_at": func.now()
+        }
+    ).returning(Incident.incident_number)
+    incident_number = (await db.execute(upsert)).scalar_one()
     
     await db.commit()
     
     return {
         "status": "acknowledged",
         "alert_id": payload.alert_id,
-        "incident_number": incident.incident_number,
+        "incident_number": incident_number,
         "acknowledged_by": current_user.id,
-        "acknowledged_at": alert.acknowledged_at.isoformat()
+        "acknowledged_at": acknowledged_at.isoformat()
     }
 
 
@@ -910,38 +990,26 @@ async def close_incident(
     db: AsyncSession = Depends(get_db)
 ):
     """Close an incident"""
-    # Get incident
-    incident_query = select(Incident).where(Incident.alert_id == payload.alert_id)
-    incident_result = await db.execute(incident_query)
-    incident = incident_result.scalar_one_or_none()
-    
-    if not incident:
+    closed_at = now_ist()
+    incident_number = (await db.execute(_CLOSE_INCIDENT, {
+        "close_alert_id": payload.alert_id,
+        "notes": payload.notes or None,
+        "resolved_by_id": current_user.id,
+        "closed_at": closed_at
+    })).scalar_one_or_none()
+    
+    if incident_number is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Incident not found"
         )
     
-    # Update incident
-    incident.status = "closed"
-    if payload.notes:
-        incident.resolution_notes = payload.notes
-    
-    # Update associated alert
-    alert_query = select(Alert).where(Alert.id == payload.alert_id)
-    alert_result = await db.execute(alert_query)
-    alert = alert_result.scalar_one_or_none()
-    
-    if alert:
-        alert.is_resolved = True
-        alert.resolved_by = current_user.id
-        alert.resolved_at = now_ist()
-    
     await db.commit()
     
     return {
         "status": "closed",
-        "incident_number": incident.incident_number,
-        "closed_at": ist_isoformat()
+        "incident_number": incident_number,
+        "closed_at": closed_at.isoformat()
     }
 
 
@@ -1034,7 +1102,7 @@ async def generate_efir_record(
     # Prepare E-FIR data for blockchain
     efir_data = {
         "incident_number": incident.incident_number,
-        "alert_type": alert.type.value,
+        "alert_type": alert.type,
         "severity": alert.severity.value,
         "tourist_id": tourist.id,
         "tourist_name": tourist.name or tourist.email,
@@ -1072,7 +1140,7 @@ async def generate_efir_record(
         blockchain_tx_id=tx_id,
         block_hash=block_hash,
         chain_id="safehorizon-efir-chain",
-        incident_type=alert.type.value,
+        incident_type=alert.type,
         severity=alert.severity.value,
         description=alert.description or "No description provided",
         location_lat=tourist.last_location_lat,
@@ -1121,8 +1189,6 @@ async def list_efir_records(
     db: AsyncSession = Depends(get_db)
 ):
     """Get list of all E-FIR records with filtering options"""
-    import json
-    
     # Build query - join with incident only if incident_id is not null
     query = select(EFIR).outerjoin(
         Incident, EFIR.incident_id == Incident.id
@@ -1208,8 +1274,8 @@ async def list_efir_records(
                 "department": efir.officer_department
             } if efir.reported_by else None,
             "officer_notes": efir.officer_notes,
-            "witnesses": json.loads(efir.witnesses) if efir.witnesses else [],
-            "evidence": json.loads(efir.evidence) if efir.evidence else [],
+            "witnesses": efir.witnesses or [],
+            "evidence": efir.evidence or [],
             "is_verified": efir.is_verified,
             "verification_timestamp": efir.verification_timestamp.isoformat() if efir.verification_timestamp else None,
             "incident_timestamp": efir.incident_timestamp.isoformat(),
@@ -1237,10 +1303,34 @@ async def list_efir_records(
 
 @router.get("/zones/manage")
 async def list_zones_for_management(
+    minlon: Optional[float] = None,
+    minlat: Optional[float] = None,
+    maxlon: Optional[float] = None,
+    maxlat: Optional[float] = None,
     current_user: AuthUser = Depends(get_current_authority)
 ):
-    """Get list of all restricted zones for management"""
-    return await get_all_zones()
+    """Get list of all restricted zones for management, optionally limited to a map viewport"""
+    bbox = (minlon, minlat, maxlon, maxlat)
+    if any(v is not None for v in bbox):
+        if any(v is None for v in bbox):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="minlon, minlat, maxlon and maxlat must be given together"
+            )
+        if minlat > maxlat:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="minlat must not exceed maxlat"
+            )
+        # Viewport queries are cheap and vary per client; only the full list is cached
+        return await get_all_zones(bbox=bbox)
+    
+    cached = await get_cached_response(ZONES_KEY)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
+    body = await cache_response(ZONES_KEY, await get_all_zones(), ttl=ZONES_TTL)
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/zones/create")
@@ -1263,6 +1353,7 @@ async def create_restricted_zone(
         coordinates=payload.coordinates,
         created_by=current_user.id
     )
+    await invalidate_cached_response(ZONES_KEY)
     
     return result
 
@@ -1280,6 +1371,7 @@ async def delete_restricted_zone(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Zone not found"
         )
+    await invalidate_cached_response(ZONES_KEY)
     
     return {"status": "zone_deleted", "id": zone_id}
 
@@ -1385,7 +1477,7 @@ async def get_heatmap_data(
             alert_data = {
                 "id": alert.id,
                 "tourist_id": alert.tourist_id,
-                "type": alert.type.value,
+                "type": alert.type,
                 "severity": alert.severity.value,
                 "location": {
                     "lat": alert_lat,
@@ -1606,7 +1698,7 @@ async def get_heatmap_alerts(
         alert_data = {
             "id": alert.id,
             "tourist_id": alert.tourist_id,
-            "type": alert.type.value,
+            "type": alert.type,
             "severity": alert.severity.value,
             "location": {
                 "lat": alert_lat,
@@ -1804,7 +1896,7 @@ def _get_zone_risk_weight(zone_type: ZoneType) -> float:
     return weights.get(zone_type, 0.5)
 
 
-def _get_alert_weight(severity: AlertSeverity, alert_type: AlertType) -> float:
+def _get_alert_weight(severity: AlertSeverity, alert_type: str) -> float:
     """Get weight for alert based on severity and type"""
     severity_weights = {
         AlertSeverity.LOW: 0.25,
@@ -1814,11 +1906,11 @@ def _get_alert_weight(severity: AlertSeverity, alert_type: AlertType) -> float:
     }
     
     type_weights = {
-        AlertType.SOS: 1.0,
-        AlertType.PANIC: 0.9,
-        AlertType.ANOMALY: 0.6,
-        AlertType.GEOFENCE: 0.4,
-        AlertType.SEQUENCE: 0.5
+        AlertType.SOS.value: 1.0,
+        AlertType.PANIC.value: 0.9,
+        AlertType.ANOMALY.value: 0.6,
+        AlertType.GEOFENCE.value: 0.4,
+        AlertType.SEQUENCE.value: 0.5
     }
     
     return severity_weights.get(severity, 0.5) * type_weights.get(alert_type, 0.5)
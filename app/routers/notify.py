@@ -48,8 +48,7 @@ class BroadcastRequest(BaseModel):
 @router.post("/notify/push")
 async def send_push_notification(
     req: PushRequest,
-    current_user: AuthUser = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: AuthUser = Depends(get_current_user)
 ):
     """Send push notification to specific user or device token"""
     try:
@@ -295,7 +294,7 @@ async def get_notification_history(
                 "title": alert.title,
                 "body": alert.description,
                 "severity": alert.severity.value,
-                "alert_type": alert.type.value,
+                "alert_type": alert.type,
                 "tourist_id": alert.tourist_id,
                 "created_at": alert.created_at.isoformat(),
                 "acknowledged": alert.is_acknowledged
@@ -375,8 +374,7 @@ async def get_notification_settings(
 @router.put("/notify/settings")
 async def update_notification_settings(
     settings: Dict[str, Any],
-    current_user: AuthUser = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: AuthUser = Depends(get_current_user)
 ):
     """
     Update notification settings for current user.
@@ -445,7 +443,7 @@ async def get_public_panic_alerts(
         select(Alert, Location)
         .outerjoin(Location, Alert.location_id == Location.id)
         .where(
-            Alert.type.in_([AlertType.PANIC, AlertType.SOS]),
+            Alert.type.in_([AlertType.PANIC.value, AlertType.SOS.value]),
             Alert.created_at >= time_threshold
         )
     )
@@ -466,7 +464,7 @@ async def get_public_panic_alerts(
             func.count(Alert.id).filter(Alert.is_resolved == True).label('resolved')
         )
         .where(
-            Alert.type.in_([AlertType.PANIC, AlertType.SOS]),
+            Alert.type.in_([AlertType.PANIC.value, AlertType.SOS.value]),
             Alert.created_at >= time_threshold
         )
     )
@@ -505,7 +503,7 @@ async def get_public_panic_alerts(
         
         panic_list.append({
             "alert_id": alert.id,
-            "type": alert.type.value,
+            "type": alert.type,
             "severity": alert.severity.value,
             "title": alert.title,
             "description": "Emergency situation - assistance needed",  # Generic description for privacy
@@ -7,17 +7,18 @@ from sqlalchemy import select, desc, func, and_
 import logging
 import traceback
 
-from ..database import get_db
+from ..database import get_db, insert_location
 from ..utils.timezone import now_ist, ist_isoformat, ensure_ist
 from ..auth.local_auth_utils import (
     authenticate_user, create_user_account, get_current_tourist, AuthUser, get_current_user
 )
+from ..auth.user_cache import invalidate_user
 from ..models.database_models import (
     Tourist, Trip, Location, Alert, AlertType, AlertSeverity, TripStatus
 )
-from ..services.scoring import compute_safety_score, should_trigger_alert, get_risk_level
+from ..services.scoring import get_risk_level
 from ..services.notifications import send_emergency_alert
-from ..services.websocket_manager import websocket_manager
+from ..services.websocket_manager import websocket_manager, location_topics
 from ..services.geofence import get_all_zones
 from ..services.blockchain import generate_efir
 from ..services.location_safety import LocationSafetyScoreCalculator
@@ -85,6 +86,7 @@ async def register_user(payload: RegisterRequest, db: AsyncSession = Depends(get
         
         # Create user account locally (this also creates the tourist record)
         auth_response = await create_user_account(
+            db,
             email=payload.email,
             password=payload.password,
             role="tourist",
@@ -121,11 +123,11 @@ async def register_user(payload: RegisterRequest, db: AsyncSession = Depends(get
 
 
 @router.post("/auth/login")
-async def login_user(payload: LoginRequest):
+async def login_user(payload: LoginRequest, db: AsyncSession = Depends(get_db)):
     """Login tourist user"""
     try:
         logger.info(f"Login attempt for tourist: {payload.email}")
-        auth_response = await authenticate_user(payload.email, payload.password, role="tourist")
+        auth_response = await authenticate_user(db, payload.email, payload.password, role="tourist")
         logger.info(f"Tourist logged in successfully: {payload.email}")
         return auth_response  # This already contains access_token, token_type, user_id, email, role
     except HTTPException as he:
@@ -206,8 +208,8 @@ async def end_trip(
     trip.status = TripStatus.COMPLETED
     trip.end_date = now_ist()
     
+    # Sessions use expire_on_commit=False, so the values set above are still loaded
     await db.commit()
-    await db.refresh(trip)  # Refresh to ensure trip object is up to date
     
     return {
         "trip_id": trip.id,
@@ -320,25 +322,23 @@ async def update_location(
             last_location.safety_score = location_safety_data['safety_score']
             last_location.safety_score_updated_at = now_ist()
             
-            location_record = last_location
+            location_id = last_location.id
             action = "updated"
-            logger.info(f"Updated existing location record {location_record.id} for tourist {current_user.id}")
+            logger.info(f"Updated existing location record {location_id} for tourist {current_user.id}")
         else:
-            # Create new location record with AI safety score
-            location_record = Location(
-                tourist_id=current_user.id,
-                trip_id=current_trip.id if current_trip else None,
-                latitude=final_lat,
-                longitude=final_lon,
-                altitude=location.altitude,
-                speed=location.speed,
-                accuracy=location.accuracy,
-                timestamp=location.timestamp,
-                safety_score=location_safety_data['safety_score'],
-                safety_score_updated_at=now_ist()
-            )
-            
-            db.add(location_record)
+            # Create new location record with AI safety score (Core insert, id returned directly)
+            location_id = await insert_location(db, {
+                "tourist_id": current_user.id,
+                "trip_id": current_trip.id if current_trip else None,
+                "latitude": final_lat,
+                "longitude": final_lon,
+                "altitude": location.altitude,
+                "speed": location.speed,
+                "accuracy": location.accuracy,
+                "timestamp": location.timestamp,
+                "safety_score": location_safety_data['safety_score'],
+                "safety_score_updated_at": now_ist()
+            })
             action = "created"
             logger.info(f"Created new location record for tourist {current_user.id}")
         
@@ -375,7 +375,7 @@ async def update_location(
             # Create alert with AI analysis
             alert = Alert(
                 tourist_id=current_user.id,
-                location_id=location_record.id,
+                location_id=location_id,
                 type=AlertType.ANOMALY,
                 severity=severity,
                 title=f"AI Safety Alert - Score: {safety_score}",
@@ -403,20 +403,25 @@ async def update_location(
                 "timestamp": ist_isoformat()
             }
             
-            await websocket_manager.publish_alert("authority", alert_data)
+            await websocket_manager.publish_alert(
+                "authority", alert_data, topics=await location_topics(location.lat, location.lon)
+            )
             
             logger.warning(f"AI Safety Alert triggered for tourist {current_user.id}: " +
                           f"score={safety_score}, risk={risk_level}")
         else:
             await db.commit()
         
+        # Tourist safety_score/last_seen changed; drop the auth-dependency snapshot
+        await invalidate_user(current_user.id)
+        
         logger.info(f"Location {action} with AI safety analysis for tourist {current_user.id}, " +
                    f"location_score={safety_score}, risk={risk_level}")
         
         return {
             "status": "location_updated",
             "action": action,  # "created" or "updated"
-            "location_id": location_record.id,
+            "location_id": location_id,
             "is_same_location": is_same_location,
             "location_safety_score": safety_score,
             "tourist_safety_score": tourist.safety_score if tourist else None,
@@ -440,92 +445,6 @@ async def update_location(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update location: {str(e)}"
         )
-    recent_locations_query = select(Location).where(
-        Location.tourist_id == current_user.id,
-        Location.timestamp >= now_ist() - timedelta(hours=2)
-    ).order_by(desc(Location.timestamp)).limit(20)
-    
-    recent_result = await db.execute(recent_locations_query)
-    recent_locations = recent_result.scalars().all()
-    
-    # Prepare context for safety scoring
-    location_history = [
-        {
-            "latitude": loc.latitude,
-            "longitude": loc.longitude,
-            "speed": loc.speed or 0,
-            "timestamp": loc.timestamp.isoformat()
-        }
-        for loc in recent_locations
-    ]
-    
-    current_location_data = {
-        "latitude": location.lat,
-        "longitude": location.lon,
-        "speed": location.speed or 0,
-        "timestamp": location.timestamp.isoformat()
-    }
-    
-    # Compute safety score
-    safety_context = {
-        "lat": location.lat,
-        "lon": location.lon,
-        "location_history": location_history,
-        "current_location_data": current_location_data
-    }
-    
-    safety_score = await compute_safety_score(safety_context)
-    
-    # Update tourist's safety score and location
-    tourist_query = select(Tourist).where(Tourist.id == current_user.id)
-    tourist_result = await db.execute(tourist_query)
-    tourist = tourist_result.scalar_one_or_none()
-    
-    if tourist:
-        tourist.safety_score = safety_score
-        tourist.last_location_lat = location.lat
-        tourist.last_location_lon = location.lon
-        tourist.last_seen = now_ist()
-    
-    # Check if alert should be triggered
-    if should_trigger_alert(safety_score):
-        alert = Alert(
-            tourist_id=current_user.id,
-            location_id=location_record.id,
-            type=AlertType.ANOMALY,
-            severity=AlertSeverity.HIGH if safety_score < 40 else AlertSeverity.MEDIUM,
-            title=f"Safety Alert - Score: {safety_score}",
-            description=f"Safety score dropped to {safety_score}. Risk level: {get_risk_level(safety_score)}"
-        )
-        
-        db.add(alert)
-        await db.commit()
-        await db.refresh(alert)
-        
-        # Broadcast alert to police dashboard
-        alert_data = {
-            "type": "safety_alert",
-            "alert_id": alert.id,
-            "tourist_id": current_user.id,
-            "severity": alert.severity.value,
-            "safety_score": safety_score,
-            "location": {"lat": location.lat, "lon": location.lon},
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        await websocket_manager.publish_alert("authority", alert_data)
-    else:
-        await db.commit()
-    
-    return {
-        "status": "location_updated",
-        "location_id": location_record.id,
-        "safety_score": safety_score,
-        "risk_level": get_risk_level(safety_score),
-        "lat": location.lat,
-        "lon": location.lon,
-        "timestamp": location.timestamp.isoformat()
-    }
 
 
 @router.get("/location/history")
@@ -908,7 +827,6 @@ async def generate_efir_report(
     db: AsyncSession = Depends(get_db)
 ):
     """Generate E-FIR (Electronic First Information Report) for tourist-reported incidents"""
-    import json
     from ..models.database_models import EFIR
     
     # Get tourist data
@@ -996,17 +914,17 @@ async def generate_efir_report(
             officer_badge=None,
             officer_department=None,
             report_source="tourist",
-            witnesses=json.dumps(payload.witnesses) if payload.witnesses else None,
+            witnesses=payload.witnesses or None,
             evidence=None,
             officer_notes=None,
             is_verified=False,  # Tourist reports need verification
             verification_timestamp=None,
             incident_timestamp=payload.timestamp,
-            additional_data=json.dumps({
+            additional_data={
                 "additional_details": payload.additional_details,
                 "emergency_contact": tourist.emergency_contact,
                 "emergency_phone": tourist.emergency_phone
-            }) if payload.additional_details else None
+            } if payload.additional_details else None
         )
         
         db.add(efir_record)
@@ -1081,8 +999,7 @@ async def get_nearby_zones_for_tourist(
     longitude: Optional[float] = None,
     radius: Optional[int] = None,
     radius_km: Optional[float] = None,
-    current_user: AuthUser = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: AuthUser = Depends(get_current_user)
 ):
     """Get zones near tourist's current location"""
     from ..services.geofence import get_nearby_zones
@@ -1204,7 +1121,6 @@ async def get_my_efirs(
     db: AsyncSession = Depends(get_db)
 ):
     """Get all E-FIRs submitted by the current tourist"""
-    import json
     from ..models.database_models import EFIR
     
     # Query E-FIRs for this tourist
@@ -1234,7 +1150,7 @@ async def get_my_efirs(
             "blockchain_tx_id": efir.blockchain_tx_id,
             "is_verified": efir.is_verified,
             "verification_timestamp": efir.verification_timestamp.isoformat() if efir.verification_timestamp else None,
-            "witnesses": json.loads(efir.witnesses) if efir.witnesses else [],
+            "witnesses": efir.witnesses or [],
             "status": "verified" if efir.is_verified else "pending_verification"
         }
         efirs_list.append(efir_data)
@@ -1254,7 +1170,6 @@ async def get_efir_details(
     db: AsyncSession = Depends(get_db)
 ):
     """Get detailed information about a specific E-FIR"""
-    import json
     from ..models.database_models import EFIR
     
     # Query E-FIR
@@ -1275,13 +1190,7 @@ async def get_efir_details(
             detail="Access denied: You can only view your own E-FIRs"
         )
     
-    # Parse additional data
-    additional_data = {}
-    if efir.additional_data:
-        try:
-            additional_data = json.loads(efir.additional_data)
-        except:
-            pass
+    additional_data = efir.additional_data or {}
     
     return {
         "success": True,
@@ -1310,7 +1219,7 @@ async def get_efir_details(
             },
             "is_verified": efir.is_verified,
             "verification_timestamp": efir.verification_timestamp.isoformat() if efir.verification_timestamp else None,
-            "witnesses": json.loads(efir.witnesses) if efir.witnesses else [],
+            "witnesses": efir.witnesses or [],
             "additional_details": additional_data.get("additional_details"),
             "report_source": efir.report_source,
             "status": "verified" if efir.is_verified else "pending_verification"
@@ -1773,17 +1682,12 @@ async def acknowledge_broadcast(
             # First create location if lat/lon provided
             location_id = None
             if ack_data.lat and ack_data.lon:
-                from ..models.database_models import Location
-                location = Location(
-                    tourist_id=current_user.id,
-                    latitude=ack_data.lat,
-                    longitude=ack_data.lon,
-                    timestamp=datetime.now(timezone.utc)
-                )
-                db.add(location)
-                await db.commit()
-                await db.refresh(location)
-                location_id = location.id
+                location_id = await insert_location(db, {
+                    "tourist_id": current_user.id,
+                    "latitude": ack_data.lat,
+                    "longitude": ack_data.lon,
+                    "timestamp": datetime.now(timezone.utc)
+                })
             
             alert = Alert(
                 tourist_id=current_user.id,
@@ -1,38 +1,131 @@
+import asyncio
+import logging
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 import joblib
 import os
+import time
 from datetime import datetime, timedelta
-from ..models.model_registry import save_model, load_model
+from ..models.model_registry import (
+    save_model, load_model, refresh_model_files, onnx_model_path, save_onnx_model,
+    model_stamp, MODEL_STAMP_CHECK_INTERVAL,
+)
 from ..config import get_settings
 
+# ONNX export (training) and inference (scoring); sklearn is used when missing
+try:
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    SKL2ONNX_AVAILABLE = True
+except ImportError:
+    SKL2ONNX_AVAILABLE = False
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# score_point requests already queued when a batch starts share one model call
+POINT_BATCH_MAX = 64
+
+# Files whose rewrite (by a retrain in any process) triggers a reload
+_MODEL_FILES = ("isolation_forest.pkl", "anomaly_scaler.pkl", "isolation_forest.onnx")
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return pd.Timestamp(value).to_pydatetime()
+
+
+def _fill_point_features(out: np.ndarray, location_data: Dict[str, Any]) -> None:
+    """Write [speed, lat, lon, hour, day_of_week, 0, 0] for one point into out"""
+    ts = _parse_timestamp(location_data.get("timestamp"))
+    out[0] = location_data.get("speed") or 0.0
+    out[1] = location_data["latitude"]
+    out[2] = location_data["longitude"]
+    out[3] = ts.hour if ts else 0
+    out[4] = ts.weekday() if ts else 0
+    out[5] = 0.0
+    out[6] = 0.0
+
+
+def _export_isolation_forest(model: IsolationForest, n_features: int) -> Optional[bytes]:
+    """Serialized ONNX graph of the forest (outputs: label, scores), or None if export is unavailable"""
+    if not SKL2ONNX_AVAILABLE:
+        return None
+    try:
+        onnx_model = convert_sklearn(
+            model,
+            initial_types=[("X", FloatTensorType([None, n_features]))],
+            target_opset={"": 15, "ai.onnx.ml": 3},
+        )
+        return onnx_model.SerializeToString()
+    except Exception as e:
+        logger.warning(f"IsolationForest ONNX export failed: {e}")
+        return None
+
 
 class AnomalyDetector:
     def __init__(self):
         self.isolation_forest: Optional[IsolationForest] = None
         self.scaler: Optional[StandardScaler] = None
+        self.onnx_session = None
         self.feature_columns = [
             'speed', 'lat', 'lon', 'hour', 'day_of_week', 
             'distance_from_previous', 'time_since_previous'
         ]
+        # Micro-batching of concurrent score_point calls (created on first use)
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        # mtimes of _MODEL_FILES at the last load, and when they were last re-checked
+        self._model_stamp: Optional[Tuple[Optional[int], ...]] = None
+        self._stamp_checked_at = 0.0
         
     def _load_models(self):
         """Load trained models from disk"""
+        self._model_stamp = model_stamp(*_MODEL_FILES)
+        self._stamp_checked_at = time.monotonic()
         try:
             self.isolation_forest = load_model("isolation_forest")
             self.scaler = load_model("anomaly_scaler")
         except FileNotFoundError:
             # Models not trained yet
-            pass
+            return
+        
+        self.onnx_session = None
+        path = onnx_model_path("isolation_forest")
+        if ONNXRUNTIME_AVAILABLE and os.path.exists(path):
+            try:
+                self.onnx_session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+            except Exception as e:
+                logger.warning(f"Falling back to sklearn IsolationForest scoring: {e}")
     
-    def _extract_features(self, locations_data: List[Dict[str, Any]]) -> pd.DataFrame:
-        """Extract features from location data for anomaly detection"""
-        if not locations_data:
+    def _refresh_models(self):
+        """Load models on first use, and again once a retrain has rewritten their files"""
+        if not self.isolation_forest or not self.scaler:
+            self._load_models()
+            return
+        now = time.monotonic()
+        if now - self._stamp_checked_at < MODEL_STAMP_CHECK_INTERVAL:
+            return
+        self._stamp_checked_at = now
+        if model_stamp(*_MODEL_FILES) != self._model_stamp:
+            self._load_models()
+    
+    def _extract_features(self, locations_data: Union[List[Dict[str, Any]], np.ndarray]) -> pd.DataFrame:
+        """Extract features from location dicts or a structured array (admin TRAINING_DTYPE)"""
+        if len(locations_data) == 0:
             return pd.DataFrame()
         
         df = pd.DataFrame(locations_data)
@@ -71,7 +164,7 @@ class AnomalyDetector:
         # Select only the features we need
         return df[self.feature_columns]
     
-    async def train(self, locations_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def train(self, locations_data: Union[List[Dict[str, Any]], np.ndarray]) -> Dict[str, Any]:
         """Train the anomaly detection model"""
         if len(locations_data) < 50:
             return {"status": "insufficient_data", "message": "Need at least 50 location points"}
@@ -97,6 +190,11 @@ class AnomalyDetector:
         # Save models
         save_model(self.isolation_forest, "isolation_forest")
         save_model(self.scaler, "anomaly_scaler")
+        # Replaces (or, when export is unavailable, removes) the ONNX copy so it never lags the pickle
+        save_onnx_model(
+            _export_isolation_forest(self.isolation_forest, len(self.feature_columns)),
+            "isolation_forest",
+        )
         
         return {
             "status": "success", 
@@ -106,38 +204,72 @@ class AnomalyDetector:
     
     async def score_point(self, location_data: Dict[str, Any]) -> float:
         """Score a single location point for anomaly"""
-        if not self.isolation_forest or not self.scaler:
-            self._load_models()
+        self._refresh_models()
         
         if not self.isolation_forest or not self.scaler:
             # No model trained yet, return neutral score
             return 0.0
         
-        # For single point scoring, we need to provide some context
-        # Use the single point multiple times to create a minimal sequence
-        extended_data = [location_data.copy() for _ in range(3)]
+        # Single point: build the feature row directly (no previous point, so the
+        # distance/time deltas are 0) and hand it to the batcher
+        row = np.empty(len(self.feature_columns), dtype=np.float64)
+        _fill_point_features(row, location_data)
         
-        # Convert to features
-        features_df = self._extract_features(extended_data)
+        if self._batch_queue is None:
+            self._batch_queue = asyncio.Queue()
+        if self._batch_task is None or self._batch_task.done():
+            self._batch_task = asyncio.create_task(self._run_point_batches())
         
-        if features_df.empty:
-            return 0.0
+        future = asyncio.get_running_loop().create_future()
+        self._batch_queue.put_nowait((row, future))
+        return await future
+    
+    def _score_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Anomaly scores in [0, 1] for a (batch, features) matrix"""
+        if not self.isolation_forest or not self.scaler:
+            self._load_models()
         
-        # Use only the first row (original point) for scoring
-        features_single = features_df.iloc[0:1]
+        if not self.isolation_forest or not self.scaler:
+            return np.zeros(len(rows))
         
-        # Scale features
-        features_scaled = self.scaler.transform(features_single)
+        # StandardScaler arithmetic applied to the whole batch
+        features_scaled = (rows - self.scaler.mean_) / self.scaler.scale_
         
-        # Get anomaly score (negative values are more anomalous)
-        score = self.isolation_forest.decision_function(features_scaled)[0]
+        # Get anomaly score (negative values are more anomalous); the ONNX
+        # "scores" output is decision_function computed by native tree kernels
+        if self.onnx_session is not None:
+            scores = self.onnx_session.run(
+                ["scores"], {"X": features_scaled.astype(np.float32)}
+            )[0].ravel()
+        else:
+            scores = self.isolation_forest.decision_function(features_scaled)
         
         # Convert to 0-1 scale where higher values indicate more anomalous behavior
         # Isolation Forest returns values roughly between -0.5 and 0.5
-        normalized_score = max(0, min(1, (0.5 - score)))
-        
-        return float(normalized_score)
-
+        return np.clip(0.5 - scores, 0, 1)
+    
+    async def _run_point_batches(self):
+        """Coalesce queued score_point rows into one decision_function call per batch"""
+        queue = self._batch_queue
+        while True:
+            batch = [await queue.get()]
+            # One loop tick lets requests scheduled alongside this one enqueue;
+            # then flush whatever is waiting, so a lone request never idles
+            await asyncio.sleep(0)
+            while len(batch) < POINT_BATCH_MAX and not queue.empty():
+                batch.append(queue.get_nowait())
+            
+            try:
+                scores = self._score_rows(np.stack([row for row, _ in batch]))
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), score in zip(batch, scores):
+                if not future.done():
+                    future.set_result(float(score))
 
 # Global instance
 anomaly_detector = AnomalyDetector()
@@ -148,6 +280,24 @@ async def score_point(features: Dict[str, Any]) -> float:
     return await anomaly_detector.score_point(features)
 
 
-async def train_anomaly_model(locations_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+async def train_anomaly_model(locations_data: Union[List[Dict[str, Any]], np.ndarray]) -> Dict[str, Any]:
     """Train the anomaly detection model"""
     return await anomaly_detector.train(locations_data)
+
+
+def train_anomaly_model_sync(locations_data: Union[List[Dict[str, Any]], np.ndarray]) -> Dict[str, Any]:
+    """Blocking training entry point for a worker process (fresh detector, saves to the registry)"""
+    return asyncio.run(AnomalyDetector().train(locations_data))
+
+
+def warm_anomaly_model() -> None:
+    """Load the trained model (if any) up front, e.g. at startup"""
+    anomaly_detector._load_models()
+
+
+def reload_anomaly_model() -> None:
+    """Drop in-process models so the next score reloads what a training worker saved"""
+    anomaly_detector.isolation_forest = None
+    anomaly_detector.scaler = None
+    anomaly_detector.onnx_session = None
+    refresh_model_files()
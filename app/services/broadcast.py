@@ -4,7 +4,6 @@ Emergency Broadcast Service
 Handles sending location-based emergency alerts to tourists.
 """
 import logging
-import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -19,6 +18,8 @@ from .notifications import notification_service
 
 logger = logging.getLogger(__name__)
 
+KM_PER_DEGREE_LAT = 111.32
+
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -52,20 +53,30 @@ async def find_tourists_in_radius(
     radius_km: float
 ) -> List[Tourist]:
     """Find all active tourists within radius of a point"""
-    # Get all active tourists with last known locations
-    stmt = select(Tourist).where(
-        and_(
-            Tourist.is_active == True,
-            Tourist.last_location_lat.isnot(None),
-            Tourist.last_location_lon.isnot(None)
-        )
-    )
+    # Bounding-box prefilter in SQL (served by idx_tourists_active_last_location),
+    # so only nearby candidates are loaded for the exact haversine check
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    conditions = [
+        Tourist.is_active == True,
+        Tourist.last_location_lat.between(center_lat - lat_delta, center_lat + lat_delta),
+        Tourist.last_location_lon.isnot(None)
+    ]
+    cos_lat = cos(radians(center_lat))
+    if cos_lat > 1e-6:
+        lon_delta = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+        # Skip the longitude bound near the poles or across the antimeridian
+        if lon_delta < 180 and -180 <= center_lon - lon_delta and center_lon + lon_delta <= 180:
+            conditions.append(
+                Tourist.last_location_lon.between(center_lon - lon_delta, center_lon + lon_delta)
+            )
+    
+    stmt = select(Tourist).where(and_(*conditions))
     result = await db.execute(stmt)
-    all_tourists = result.scalars().all()
+    candidates = result.scalars().all()
     
     # Filter by distance
     tourists_in_radius = []
-    for tourist in all_tourists:
+    for tourist in candidates:
         distance = haversine_distance(
             center_lat, center_lon,
             tourist.last_location_lat, tourist.last_location_lon
@@ -379,12 +390,12 @@ async def broadcast_region(
     )
     
     # Save broadcast record
-    region_bounds_json = json.dumps({
+    region_bounds = {
         "min_lat": min_lat,
         "max_lat": max_lat,
         "min_lon": min_lon,
         "max_lon": max_lon
-    })
+    }
     
     broadcast = EmergencyBroadcast(
         broadcast_id=broadcast_id,
@@ -394,7 +405,7 @@ async def broadcast_region(
         severity=severity,
         alert_type=alert_type,
         action_required=action_required,
-        region_bounds=region_bounds_json,
+        region_bounds=region_bounds,
         tourists_notified_count=notification_counts["tourists"],
         devices_notified_count=notification_counts["devices"],
         sent_by=authority_id
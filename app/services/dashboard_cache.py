@@ -0,0 +1,85 @@
+"""
+Short-lived Redis cache of serialized admin/authority dashboard responses
+"""
+import logging
+from typing import Optional, Any
+import aioredis
+import orjson
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+DASHBOARD_CACHE_TTL = 15  # seconds
+ACTIVE_TOURISTS_TTL = 10  # seconds
+ZONES_TTL = 300  # seconds; zone edits invalidate explicitly
+
+STATUS_KEY = "admin:status"
+ANALYTICS_KEY_PREFIX = "admin:analytics:"
+ACTIVE_TOURISTS_KEY = "authority:tourists:active:v1"
+ZONES_KEY = "authority:zones:v1"
+
+_redis: Optional[aioredis.Redis] = None
+
+
+def _get_redis() -> aioredis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = aioredis.from_url(settings.redis_url)
+    return _redis
+
+
+async def close_dashboard_cache() -> None:
+    """Close the Redis client on shutdown"""
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
+
+
+def analytics_key(days: int) -> str:
+    return f"{ANALYTICS_KEY_PREFIX}{days}"
+
+
+async def get_cached_response(key: str) -> Optional[bytes]:
+    """Return the cached JSON body, or None on miss"""
+    try:
+        return await _get_redis().get(key)
+    except Exception as e:
+        logger.warning(f"Dashboard cache read failed for {key}: {e}")
+        return None
+
+
+async def cache_response(key: str, payload: Any, ttl: int = DASHBOARD_CACHE_TTL) -> bytes:
+    """Serialize the payload once, store it, and return the JSON body"""
+    return await cache_body(key, orjson.dumps(payload), ttl)
+
+
+async def cache_body(key: str, body: bytes, ttl: int = DASHBOARD_CACHE_TTL) -> bytes:
+    """Store an already-serialized JSON body (e.g. built by Postgres) and return it"""
+    try:
+        await _get_redis().setex(key, ttl, body)
+    except Exception as e:
+        logger.warning(f"Dashboard cache write failed for {key}: {e}")
+    return body
+
+
+async def invalidate_dashboard_cache() -> None:
+    """Drop cached status/analytics responses, e.g. after a model retrain"""
+    try:
+        redis = _get_redis()
+        keys = [STATUS_KEY]
+        async for key in redis.scan_iter(match=f"{ANALYTICS_KEY_PREFIX}*"):
+            keys.append(key)
+        await redis.delete(*keys)
+    except Exception as e:
+        logger.warning(f"Dashboard cache invalidation failed: {e}")
+
+
+async def invalidate_cached_response(key: str) -> None:
+    """Drop one cached response, e.g. the zone list after a zone is created or deleted"""
+    try:
+        await _get_redis().delete(key)
+    except Exception as e:
+        logger.warning(f"Dashboard cache invalidation failed for {key}: {e}")
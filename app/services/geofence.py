@@ -1,10 +1,27 @@
+import ast
+import asyncio
+import json
 import math
-from typing import Any, Dict, List, Optional
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from cachetools import LRUCache
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, text, func
 from ..models.database_models import RestrictedZone, ZoneType
 from ..database import AsyncSessionLocal
 
+# Zones are edited rarely; other workers pick up changes within this window
+ZONE_INDEX_TTL = 60  # seconds
+METERS_PER_DEGREE_LAT = 111320
+EARTH_RADIUS_METERS = 6371000
+
+# check_point results are memoized per ~11m cell (4 decimal places)
+POINT_CACHE_PRECISION = 4
+POINT_CACHE_SIZE = 10000
+
 
 def _haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Calculate the great circle distance between two points on earth in meters"""
@@ -22,119 +39,193 @@ def _haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> f
     return c * r
 
 
-async def check_point(lat: float, lon: float) -> Dict[str, Any]:
-    """Check if a point is inside any restricted zones using simple distance calculation"""
-    async with AsyncSessionLocal() as session:
-        # Query all active zones
-        query = select(RestrictedZone).where(RestrictedZone.is_active == True)
-        
-        result = await session.execute(query)
-        zones = result.scalars().all()
-        
-        matching_zones = []
-        
-        # Check each zone using simple distance calculation
-        for zone in zones:
-            # Calculate distance from point to zone center
-            distance = _haversine_distance(
-                lat, lon, 
-                zone.center_latitude, zone.center_longitude
-            )
-            
-            # Check if point is within zone radius (default 1km if not specified)
-            zone_radius = zone.radius_meters or 1000
-            if distance <= zone_radius:
-                matching_zones.append(zone)
-        
-        if not matching_zones:
-            return {
-                "inside_restricted": False,
-                "zones": [],
-                "risk_level": "safe"
-            }
-        
-        # Determine the highest risk level
-        zone_data = []
-        max_risk = "safe"
+def _haversine_vector(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Distances in meters from one point to arrays of points, in a single NumPy pass"""
+    phi1 = np.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = phi2 - phi1
+    dlam = np.radians(lons) - np.radians(lon)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlam / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(a))
+
+
+def _parse_coordinates(bounds_json: Optional[str]) -> Optional[list]:
+    """bounds_json -> [[lon, lat], ...]; older rows may hold a Python repr instead of JSON"""
+    if not bounds_json or not bounds_json.startswith('['):
+        return None
+    try:
+        return json.loads(bounds_json)
+    except json.JSONDecodeError:
+        try:
+            return ast.literal_eval(bounds_json)
+        except Exception:
+            return None
+
+
+@dataclass(slots=True, frozen=True)
+class _ZoneEntry:
+    """Read-only snapshot of an active zone used by point lookups"""
+    id: int
+    name: str
+    zone_type: ZoneType
+    description: Optional[str]
+    center_latitude: float
+    center_longitude: float
+    radius_meters: float  # effective radius (1km when unset)
+    coordinates: Optional[list]
+
+
+class _ZoneIndex:
+    """Active zones sorted by center latitude; lookups bisect the latitude band around a point"""
+
+    def __init__(self, entries: List[_ZoneEntry]):
+        self.entries = sorted(entries, key=lambda z: z.center_latitude)
+        self.lats = [z.center_latitude for z in self.entries]
+        # Column arrays (same order as entries) for vectorized distance checks
+        self.lat_arr = np.array(self.lats, dtype=np.float64)
+        self.lon_arr = np.array([z.center_longitude for z in self.entries], dtype=np.float64)
+        self.radius_arr = np.array([z.radius_meters for z in self.entries], dtype=np.float64)
+        self.max_radius = float(self.radius_arr.max()) if self.entries else 0.0
+        self.built_at = time.monotonic()
+        # Lives and dies with this snapshot, so zone edits/rebuilds invalidate it
+        self.point_cache: LRUCache = LRUCache(maxsize=POINT_CACHE_SIZE)
+
+    def within(self, lat: float, lon: float, reach_meters: Optional[float] = None) -> List[Tuple[_ZoneEntry, float]]:
+        """(zone, distance) pairs within reach_meters of the point, or inside each zone's own radius when None"""
+        delta = (self.max_radius if reach_meters is None else reach_meters) / METERS_PER_DEGREE_LAT
+        lo = bisect_left(self.lats, lat - delta)
+        hi = bisect_right(self.lats, lat + delta)
+        if lo == hi:
+            return []
         
-        for zone in matching_zones:
-            zone_info = {
-                "id": zone.id,
-                "name": zone.name,
-                "type": zone.zone_type.value,
-                "description": zone.description
-            }
-            zone_data.append(zone_info)
+        distances = _haversine_vector(lat, lon, self.lat_arr[lo:hi], self.lon_arr[lo:hi])
+        limit = self.radius_arr[lo:hi] if reach_meters is None else reach_meters
+        return [(self.entries[lo + i], float(distances[i])) for i in np.flatnonzero(distances <= limit)]
+
+
+_zone_index: Optional[_ZoneIndex] = None
+_zone_index_lock = asyncio.Lock()
+
+
+async def get_zone_index() -> _ZoneIndex:
+    """Return the zone index, rebuilding it when missing or older than ZONE_INDEX_TTL"""
+    global _zone_index
+    index = _zone_index
+    if index is not None and time.monotonic() - index.built_at < ZONE_INDEX_TTL:
+        return index
+    
+    async with _zone_index_lock:
+        index = _zone_index
+        if index is None or time.monotonic() - index.built_at >= ZONE_INDEX_TTL:
+            async with AsyncSessionLocal() as session:
+                query = select(RestrictedZone).where(RestrictedZone.is_active == True)
+                result = await session.execute(query)
+                zones = result.scalars().all()
             
-            # Update max risk level
-            if zone.zone_type == ZoneType.RESTRICTED:
-                max_risk = "restricted"
-            elif zone.zone_type == ZoneType.RISKY and max_risk != "restricted":
-                max_risk = "risky"
-        
+            index = _ZoneIndex([
+                _ZoneEntry(
+                    id=zone.id,
+                    name=zone.name,
+                    zone_type=zone.zone_type,
+                    description=zone.description,
+                    center_latitude=zone.center_latitude,
+                    center_longitude=zone.center_longitude,
+                    radius_meters=zone.radius_meters or 1000,
+                    coordinates=_parse_coordinates(zone.bounds_json)
+                )
+                for zone in zones
+            ])
+            _zone_index = index
+    return index
+
+
+def invalidate_zone_index() -> None:
+    """Force the next lookup to reload zones (call after creating/deleting a zone)"""
+    global _zone_index
+    _zone_index = None
+
+
+async def check_point(lat: float, lon: float) -> Dict[str, Any]:
+    """Check if a point is inside any restricted zones using simple distance calculation"""
+    index = await get_zone_index()
+    
+    # GPS updates barely move between calls: evaluate the quantized cell once
+    lat = round(lat, POINT_CACHE_PRECISION)
+    lon = round(lon, POINT_CACHE_PRECISION)
+    cached = index.point_cache.get((lat, lon))
+    if cached is not None:
+        return cached
+    
+    result = _check_point_in_index(index, lat, lon)
+    index.point_cache[(lat, lon)] = result
+    return result
+
+
+def _check_point_in_index(index: _ZoneIndex, lat: float, lon: float) -> Dict[str, Any]:
+    """Uncached check_point evaluation against one index snapshot"""
+    # Zones whose radius contains the point; only the latitude band that can
+    # reach it is distance-checked
+    matching_zones = [zone for zone, _ in index.within(lat, lon)]
+    
+    if not matching_zones:
         return {
-            "inside_restricted": len(matching_zones) > 0,
-            "zones": zone_data,
-            "risk_level": max_risk,
-            "zone_count": len(matching_zones)
+            "inside_restricted": False,
+            "zones": [],
+            "risk_level": "safe"
         }
+    
+    # Determine the highest risk level
+    zone_data = []
+    max_risk = "safe"
+    
+    for zone in matching_zones:
+        zone_info = {
+            "id": zone.id,
+            "name": zone.name,
+            "type": zone.zone_type.value,
+            "description": zone.description
+        }
+        zone_data.append(zone_info)
+        
+        # Update max risk level
+        if zone.zone_type == ZoneType.RESTRICTED:
+            max_risk = "restricted"
+        elif zone.zone_type == ZoneType.RISKY and max_risk != "restricted":
+            max_risk = "risky"
+    
+    return {
+        "inside_restricted": len(matching_zones) > 0,
+        "zones": zone_data,
+        "risk_level": max_risk,
+        "zone_count": len(matching_zones)
+    }
 
 
 async def get_nearby_zones(lat: float, lon: float, radius_meters: int = 1000) -> List[Dict[str, Any]]:
     """Get zones within a specified radius of a point with complete coordinate information"""
-    async with AsyncSessionLocal() as session:
-        # Query all active zones
-        query = select(RestrictedZone).where(RestrictedZone.is_active == True)
-        result = await session.execute(query)
-        zones = result.scalars().all()
-        
-        zone_data = []
-        for zone in zones:
-            # Calculate distance from point to zone center
-            distance = _haversine_distance(
-                lat, lon, 
-                zone.center_latitude, zone.center_longitude
-            )
-            
-            # Include zones within the specified radius
-            if distance <= radius_meters:
-                # Parse bounds_json to get coordinates array
-                coordinates = None
-                if zone.bounds_json:
-                    try:
-                        import json
-                        import ast
-                        # Handle both JSON string and Python string representation
-                        if zone.bounds_json.startswith('['):
-                            try:
-                                coordinates = json.loads(zone.bounds_json)
-                            except json.JSONDecodeError:
-                                # Try ast.literal_eval for Python string representation
-                                coordinates = ast.literal_eval(zone.bounds_json)
-                    except Exception:
-                        # If parsing fails, use None
-                        coordinates = None
-                
-                zone_info = {
-                    "id": zone.id,
-                    "name": zone.name,
-                    "type": zone.zone_type.value,
-                    "description": zone.description,
-                    "center": {
-                        "lat": zone.center_latitude,
-                        "lon": zone.center_longitude
-                    },
-                    "center_latitude": zone.center_latitude,
-                    "center_longitude": zone.center_longitude,
-                    "radius_meters": zone.radius_meters or 1000,
-                    "coordinates": coordinates,  # Array of [lon, lat] pairs for polygon drawing
-                    "distance_meters": round(distance, 2)
-                }
-                zone_data.append(zone_info)
-        
-        return zone_data
-        
-        return zone_data
+    index = await get_zone_index()
+    
+    zone_data = []
+    # Zones whose center is within the specified radius
+    for zone, distance in index.within(lat, lon, radius_meters):
+        zone_info = {
+            "id": zone.id,
+            "name": zone.name,
+            "type": zone.zone_type.value,
+            "description": zone.description,
+            "center": {
+                "lat": zone.center_latitude,
+                "lon": zone.center_longitude
+            },
+            "center_latitude": zone.center_latitude,
+            "center_longitude": zone.center_longitude,
+            "radius_meters": zone.radius_meters,
+            "coordinates": zone.coordinates,  # Array of [lon, lat] pairs for polygon drawing
+            "distance_meters": round(distance, 2)
+        }
+        zone_data.append(zone_info)
+    
+    return zone_data
 
 
 async def create_zone(
@@ -173,7 +264,6 @@ async def create_zone(
             raise ValueError(f"Invalid zone type: {zone_type}. Must be one of: safe, risky, restricted")
         
         # Store coordinates as proper JSON string
-        import json
         coordinates_json = json.dumps(coordinates)
         
         zone = RestrictedZone(
@@ -190,6 +280,7 @@ async def create_zone(
         session.add(zone)
         await session.commit()
         await session.refresh(zone)
+        invalidate_zone_index()
         
         return {
             "id": zone.id,
@@ -205,31 +296,39 @@ async def create_zone(
         }
 
 
-async def get_all_zones() -> List[Dict[str, Any]]:
-    """Get all active zones with complete coordinate information"""
+def _zone_bbox_conditions(min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> List[Any]:
+    """SQL conditions keeping zones whose center +/- radius overlaps the bounding box"""
+    radius = func.coalesce(RestrictedZone.radius_meters, 1000)
+    lat_reach = radius / METERS_PER_DEGREE_LAT
+    conditions = [
+        RestrictedZone.center_latitude + lat_reach >= min_lat,
+        RestrictedZone.center_latitude - lat_reach <= max_lat,
+    ]
+    # Longitude degrees shrink towards the poles; size the reach for the box's
+    # highest latitude, and skip the bound for boxes crossing the antimeridian
+    cos_lat = math.cos(math.radians(min(max(abs(min_lat), abs(max_lat)), 89.0)))
+    if min_lon <= max_lon:
+        lon_reach = radius / (METERS_PER_DEGREE_LAT * cos_lat)
+        conditions.append(RestrictedZone.center_longitude + lon_reach >= min_lon)
+        conditions.append(RestrictedZone.center_longitude - lon_reach <= max_lon)
+    return conditions
+
+
+async def get_all_zones(
+    bbox: Optional[Tuple[float, float, float, float]] = None
+) -> List[Dict[str, Any]]:
+    """Get all active zones with complete coordinate information, optionally only those overlapping bbox (min_lon, min_lat, max_lon, max_lat)"""
     async with AsyncSessionLocal() as session:
         query = select(RestrictedZone).where(RestrictedZone.is_active == True)
+        if bbox is not None:
+            query = query.where(*_zone_bbox_conditions(*bbox))
         result = await session.execute(query)
         zones = result.scalars().all()
         
         zone_data = []
         for zone in zones:
             # Parse bounds_json to get coordinates array
-            coordinates = None
-            if zone.bounds_json:
-                try:
-                    import json
-                    import ast
-                    # Handle both JSON string and Python string representation
-                    if zone.bounds_json.startswith('['):
-                        try:
-                            coordinates = json.loads(zone.bounds_json)
-                        except json.JSONDecodeError:
-                            # Try ast.literal_eval for Python string representation
-                            coordinates = ast.literal_eval(zone.bounds_json)
-                except Exception:
-                    # If parsing fails, use None
-                    coordinates = None
+            coordinates = _parse_coordinates(zone.bounds_json)
             
             zone_info = {
                 "id": zone.id,
@@ -265,4 +364,5 @@ async def delete_zone(zone_id: int) -> bool:
         
         zone.is_active = False
         await session.commit()
+        invalidate_zone_index()
         return True
@@ -17,8 +17,8 @@ from typing import Dict, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_
 from ..utils.timezone import now_ist, ensure_ist
-from ..models.database_models import Location, Alert, RestrictedZone, Tourist, AlertType, AlertSeverity
-from ..services.geofence import _haversine_distance
+from ..models.database_models import Location, Alert, Tourist, AlertType, AlertSeverity
+from ..services.geofence import _haversine_distance, get_zone_index
 
 
 class LocationSafetyScoreCalculator:
@@ -218,19 +218,16 @@ class LocationSafetyScoreCalculator:
         Calculate safety score based on zone types.
         Safe zones increase score, restricted/risky zones decrease it.
         """
-        # Get all zones
-        query = select(RestrictedZone).where(RestrictedZone.is_active == True)
-        result = await self.db.execute(query)
-        zones = result.scalars().all()
+        # Zones come from the shared in-memory geofence index (loaded once, not
+        # re-queried per location); only zones within reach are considered
+        index = await get_zone_index()
+        reach_meters = index.max_radius + self.SAFE_ZONE_RADIUS_KM * 1000
         
         base_score = 70.0  # Neutral score for unknown areas
         
-        for zone in zones:
-            center_lat = zone.center_latitude
-            center_lon = zone.center_longitude
+        for zone, distance_meters in index.within(latitude, longitude, reach_meters):
             radius_km = zone.radius_meters / 1000.0
-            
-            distance_km = _haversine_distance(latitude, longitude, center_lat, center_lon)
+            distance_km = distance_meters / 1000.0
             
             # Check if location is within or near the zone
             if distance_km <= radius_km:
@@ -324,20 +324,18 @@ async def send_alert_to_tourist(
     from sqlalchemy import select
     from ..models.database_models import UserDevice
     
-    # Get all active device tokens for this tourist
-    stmt = select(UserDevice).where(
+    # Get all active device tokens for this tourist (served by idx_user_devices_active_user)
+    stmt = select(UserDevice.device_token).where(
         UserDevice.user_id == tourist_id,
         UserDevice.is_active == True
-    )
+    ).order_by(UserDevice.last_used.desc())
     result = await db.execute(stmt)
-    devices = result.scalars().all()
+    tokens = result.scalars().all()
     
-    if not devices:
+    if not tokens:
         logger.warning(f"No active devices found for tourist {tourist_id}")
         return {"success": False, "error": "No devices registered"}
     
-    tokens = [device.device_token for device in devices]
-    
     # Prepare notification data
     notification_data = data or {}
     notification_data.update({
@@ -42,36 +42,17 @@ class SafetyScorer:
         if not lat or not lon:
             return 50  # Neutral score if no location
         
-        scores = {}
-        
-        # 1. Geofence Score
-        try:
-            geofence_result = await check_point(lat, lon)
-            risk_level = geofence_result.get("risk_level", "safe")
-            geofence_risk = self.geofence_scores.get(risk_level, 0.0)
-            scores["geofence"] = geofence_risk
-        except Exception:
-            scores["geofence"] = 0.0  # Default to safe if error
-        
-        # 2. Anomaly Score
-        try:
-            if current_location_data:
-                anomaly_score = await score_point(current_location_data)
-                scores["anomaly"] = min(1.0, anomaly_score)
-            else:
-                scores["anomaly"] = 0.0
-        except Exception:
-            scores["anomaly"] = 0.0
-        
-        # 3. Sequence Score
-        try:
-            if len(location_history) >= 5:  # Need minimum points for sequence
-                sequence_score = await score_sequence(location_history)
-                scores["sequence"] = min(1.0, sequence_score)
-            else:
-                scores["sequence"] = 0.0
-        except Exception:
-            scores["sequence"] = 0.0
+        # Independent components, awaited together
+        geofence_risk, anomaly_risk, sequence_risk = await asyncio.gather(
+            self._geofence_risk(lat, lon),
+            self._anomaly_risk(current_location_data),
+            self._sequence_risk(location_history)
+        )
+        scores = {
+            "geofence": geofence_risk,
+            "anomaly": anomaly_risk,
+            "sequence": sequence_risk
+        }
         
         # 4. Manual Adjustment (normalized to 0-1 scale)
         # Manual adjustment should be between -20 and +20 points, convert to risk adjustment
@@ -89,6 +70,35 @@ class SafetyScorer:
         
         return safety_score
     
+    async def _geofence_risk(self, lat: float, lon: float) -> float:
+        """1. Geofence Score"""
+        try:
+            geofence_result = await check_point(lat, lon)
+            risk_level = geofence_result.get("risk_level", "safe")
+            return self.geofence_scores.get(risk_level, 0.0)
+        except Exception:
+            return 0.0  # Default to safe if error
+    
+    async def _anomaly_risk(self, current_location_data: Dict[str, Any]) -> float:
+        """2. Anomaly Score"""
+        try:
+            if current_location_data:
+                anomaly_score = await score_point(current_location_data)
+                return min(1.0, anomaly_score)
+            return 0.0
+        except Exception:
+            return 0.0
+    
+    async def _sequence_risk(self, location_history: List[Dict[str, Any]]) -> float:
+        """3. Sequence Score"""
+        try:
+            if len(location_history) >= 5:  # Need minimum points for sequence
+                sequence_score = await score_sequence(location_history)
+                return min(1.0, sequence_score)
+            return 0.0
+        except Exception:
+            return 0.0
+    
     async def compute_batch_scores(self, contexts: List[Dict[str, Any]]) -> List[int]:
         """Compute safety scores for multiple contexts"""
         tasks = [self.compute_safety_score(context) for context in contexts]
@@ -1,17 +1,23 @@
+import asyncio
+import os
+import time
 import numpy as np
 import pandas as pd
 import torch
 import torch.nn as nn
 import torch.optim as optim
 from torch.utils.data import DataLoader, TensorDataset
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 from sklearn.preprocessing import MinMaxScaler
 import joblib
-from ..models.model_registry import save_model, load_model
+from ..models.model_registry import save_model, load_model, refresh_model_files, model_stamp, MODEL_STAMP_CHECK_INTERVAL
 from ..config import get_settings
 
 settings = get_settings()
 
+# Files whose rewrite (by a retrain in any process) triggers a reload
+_MODEL_FILES = ("lstm_autoencoder.pth", "sequence_scaler.pkl")
+
 
 class LSTMAutoencoder(nn.Module):
     def __init__(self, input_size: int, hidden_size: int = 64, num_layers: int = 2):
@@ -51,9 +57,14 @@ class SequenceAnomalyDetector:
         self.scaler: Optional[MinMaxScaler] = None
         self.feature_columns = ['latitude', 'longitude', 'speed', 'hour', 'day_of_week']
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        # mtimes of _MODEL_FILES at the last load, and when they were last re-checked
+        self._model_stamp: Optional[Tuple[Optional[int], ...]] = None
+        self._stamp_checked_at = 0.0
         
     def _load_models(self):
         """Load trained models from disk"""
+        self._model_stamp = model_stamp(*_MODEL_FILES)
+        self._stamp_checked_at = time.monotonic()
         try:
             # Load PyTorch model
             model_path = f"{settings.models_dir}/lstm_autoencoder.pth"
@@ -71,18 +82,36 @@ class SequenceAnomalyDetector:
             self.model.to(self.device)
             self.model.eval()
             
+            if settings.sequence_model_quantize and self.device.type == 'cpu':
+                # int8 weights for the LSTM/Linear layers; activations stay float.
+                # Inference-only: training builds its own float model
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model, {nn.LSTM, nn.Linear}, dtype=torch.qint8
+                )
+            
             # Load scaler
             self.scaler = load_model("sequence_scaler")
         except (FileNotFoundError, KeyError):
             # Models not trained yet
             pass
     
-    def _prepare_sequences(self, locations_data: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
-        """Prepare location data as sequences for LSTM"""
-        if len(locations_data) < self.sequence_length:
-            return np.array([]), np.array([])
-        
+    def _refresh_models(self):
+        """Load models on first use, and again once a retrain has rewritten their files"""
+        if not self.model or not self.scaler:
+            self._load_models()
+            return
+        now = time.monotonic()
+        if now - self._stamp_checked_at < MODEL_STAMP_CHECK_INTERVAL:
+            return
+        self._stamp_checked_at = now
+        if model_stamp(*_MODEL_FILES) != self._model_stamp:
+            self._load_models()
+    
+    def _prepare_sequences(self, locations_data: Union[List[Dict[str, Any]], np.ndarray, Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Prepare location dicts, a structured array (admin TRAINING_DTYPE) or a dict of columns as sequences for LSTM"""
         df = pd.DataFrame(locations_data)
+        if len(df) < self.sequence_length:
+            return np.array([]), np.array([])
         
         # Convert timestamp to datetime features
         if 'timestamp' in df.columns:
@@ -107,7 +136,7 @@ class SequenceAnomalyDetector:
         
         return np.array(sequences), features
     
-    async def train(self, locations_data: List[Dict[str, Any]], epochs: int = 50) -> Dict[str, Any]:
+    async def train(self, locations_data: Union[List[Dict[str, Any]], np.ndarray], epochs: int = 50) -> Dict[str, Any]:
         """Train the LSTM autoencoder"""
         if len(locations_data) < self.sequence_length * 5:
             return {
@@ -168,14 +197,17 @@ class SequenceAnomalyDetector:
             
             total_loss += epoch_loss
         
-        # Save models
+        # Save models (checkpoint goes through a temp file so serving workers
+        # never load a partial one)
         model_path = f"{settings.models_dir}/lstm_autoencoder.pth"
+        tmp_path = f"{model_path}.tmp"
         torch.save({
             'model_state_dict': self.model.state_dict(),
             'hidden_size': 64,
             'num_layers': 2,
             'input_size': len(self.feature_columns)
-        }, model_path)
+        }, tmp_path)
+        os.replace(tmp_path, model_path)
         
         save_model(self.scaler, "sequence_scaler")
         
@@ -186,18 +218,20 @@ class SequenceAnomalyDetector:
             "final_loss": total_loss / (epochs * len(dataloader))
         }
     
-    async def score_sequence(self, points: List[Dict[str, Any]]) -> float:
-        """Score a sequence of points for anomaly"""
-        if not self.model or not self.scaler:
-            self._load_models()
+    async def score_sequence(self, points: Union[List[Dict[str, Any]], Dict[str, Any]]) -> float:
+        """Score a sequence of points (dicts, or a dict of equal-length columns) for anomaly"""
+        self._refresh_models()
         
         if not self.model or not self.scaler:
             return 0.0  # No model trained yet
         
-        if len(points) < self.sequence_length:
-            return 0.0  # Not enough points for sequence
-        
-        # Prepare the sequence
+        # Only the last window is scored, so only its points are prepared
+        # (too few points yields no sequences)
+        window = self.sequence_length
+        if isinstance(points, dict):
+            points = {key: values[-window:] for key, values in points.items()}
+        else:
+            points = points[-window:]
         sequences, _ = self._prepare_sequences(points)
         
         if len(sequences) == 0:
@@ -234,6 +268,41 @@ async def score_sequence(points: List[Dict[str, Any]]) -> float:
     return await sequence_detector.score_sequence(points)
 
 
-async def train_sequence_model(locations_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+async def score_sequence_arrays(
+    lats: np.ndarray,
+    lons: np.ndarray,
+    speeds: np.ndarray,
+    timestamps: List[str]
+) -> float:
+    """Score a sequence given column arrays, without building a dict per point"""
+    return await sequence_detector.score_sequence({
+        "latitude": lats,
+        "longitude": lons,
+        "speed": speeds,
+        "timestamp": timestamps
+    })
+
+
+async def train_sequence_model(locations_data: Union[List[Dict[str, Any]], np.ndarray]) -> Dict[str, Any]:
     """Train the sequence anomaly detection model"""
     return await sequence_detector.train(locations_data)
+
+
+def train_sequence_model_sync(locations_data: Union[List[Dict[str, Any]], np.ndarray]) -> Dict[str, Any]:
+    """Blocking training entry point for a worker process (fresh detector, saves to the registry)"""
+    return asyncio.run(SequenceAnomalyDetector().train(locations_data))
+
+
+def warm_sequence_model() -> None:
+    """Load the trained model (if any) up front, e.g. at startup"""
+    # One intra-op thread per server worker: single-sequence inference gains
+    # nothing from more, and several workers would oversubscribe the CPUs
+    torch.set_num_threads(1)
+    sequence_detector._load_models()
+
+
+def reload_sequence_model() -> None:
+    """Drop in-process models so the next score reloads what a training worker saved"""
+    sequence_detector.model = None
+    sequence_detector.scaler = None
+    refresh_model_files()
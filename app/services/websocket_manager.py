@@ -1,63 +1,98 @@
 import asyncio
 import json
 import logging
-from typing import Dict, List, Set, Optional, Any
+from typing import Dict, Iterable, List, Set, Optional, Any
 from fastapi import WebSocket, WebSocketDisconnect
 import aioredis
+import orjson
 
 from ..config import get_settings
+from .geofence import check_point
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Alerts from every worker go through one capped Redis stream; each worker
+# tails it and delivers entries to its own WebSocket subscribers
+ALERT_STREAM = "alerts:stream"
+ALERT_STREAM_MAXLEN = 100000
+ALERT_STREAM_READ_COUNT = 100
+ALERT_STREAM_BLOCK_MS = 1000
+
+
+def _discard(index: Dict[str, Set[WebSocket]], key: str, websocket: WebSocket):
+    """Remove a socket from one index bucket, dropping the bucket when it empties"""
+    connections = index.get(key)
+    if connections is not None:
+        connections.discard(websocket)
+        if not connections:
+            del index[key]
+
 
 class WebSocketManager:
     def __init__(self):
         # Active connections organized by channel
         self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # Connections that asked for every message on their channel, and
+        # connections subscribed to specific topics, keyed "channel:topic"
+        self.unfiltered_connections: Dict[str, Set[WebSocket]] = {}
+        self.topic_connections: Dict[str, Set[WebSocket]] = {}
         self.connection_data: Dict[WebSocket, Dict[str, Any]] = {}
         self.redis_client: Optional[aioredis.Redis] = None
-        self.redis_pubsub: Optional[aioredis.client.PubSub] = None
         self.redis_listener_task: Optional[asyncio.Task] = None
         
     async def initialize_redis(self):
-        """Initialize Redis connection for pub/sub"""
+        """Initialize Redis connection and start tailing the alert stream"""
         try:
-            self.redis_client = aioredis.from_url(settings.redis_url)
-            self.redis_pubsub = self.redis_client.pubsub()
+            redis_client = aioredis.from_url(settings.redis_url)
             
-            # Subscribe to all alert channels
-            await self.redis_pubsub.subscribe("alerts:*")
+            # Start after the newest existing entry; older alerts were already delivered
+            latest = await redis_client.xrevrange(ALERT_STREAM, count=1)
+            last_id = latest[0][0] if latest else "0-0"
             
-            # Start listening for Redis messages
-            self.redis_listener_task = asyncio.create_task(self._redis_listener())
-            logger.info("Redis pub/sub initialized successfully")
+            self.redis_client = redis_client
+            self.redis_listener_task = asyncio.create_task(self._redis_listener(last_id))
+            logger.info("Redis alert stream initialized successfully")
             
         except Exception as e:
             logger.error(f"Failed to initialize Redis: {e}")
     
-    async def _redis_listener(self):
-        """Listen for Redis pub/sub messages and broadcast to WebSocket clients"""
-        if not self.redis_pubsub:
-            return
+    async def _redis_listener(self, last_id):
+        """Read alert stream entries in batches and broadcast to WebSocket clients"""
+        while True:
+            try:
+                response = await self.redis_client.xread(
+                    {ALERT_STREAM: last_id},
+                    count=ALERT_STREAM_READ_COUNT,
+                    block=ALERT_STREAM_BLOCK_MS
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep the position and retry; entries written meanwhile are still read
+                logger.error(f"Redis listener error: {e}")
+                await asyncio.sleep(1)
+                continue
             
-        try:
-            async for message in self.redis_pubsub.listen():
-                if message["type"] == "message":
-                    channel = message["channel"].decode()
-                    data = json.loads(message["data"].decode())
-                    
-                    # Extract channel type (e.g., "alerts:authority" -> "authority")
-                    channel_type = channel.split(":", 1)[1] if ":" in channel else channel
-                    
-                    # Broadcast to appropriate WebSocket connections
-                    await self._broadcast_to_channel(channel_type, data)
-                    
-        except Exception as e:
-            logger.error(f"Redis listener error: {e}")
+            for _, entries in response:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    try:
+                        envelope = orjson.loads(fields[b"data"])
+                        await self._broadcast_to_channel(
+                            fields[b"channel"].decode(), envelope["data"], envelope.get("topics")
+                        )
+                    except Exception as e:
+                        logger.error(f"Failed to deliver alert stream entry {entry_id}: {e}")
     
-    async def connect(self, websocket: WebSocket, channel: str, user_data: Dict[str, Any]):
-        """Accept a WebSocket connection and add to channel"""
+    async def connect(
+        self,
+        websocket: WebSocket,
+        channel: str,
+        user_data: Dict[str, Any],
+        topics: Optional[List[str]] = None
+    ):
+        """Accept a WebSocket connection and add to channel (optionally only for some topics)"""
         await websocket.accept()
         
         # Add to channel
@@ -65,9 +100,18 @@ class WebSocketManager:
             self.active_connections[channel] = set()
         self.active_connections[channel].add(websocket)
         
+        # Index by topic so targeted broadcasts only visit interested sockets
+        topics = list(dict.fromkeys(topics)) if topics else []
+        if topics:
+            for topic in topics:
+                self.topic_connections.setdefault(f"{channel}:{topic}", set()).add(websocket)
+        else:
+            self.unfiltered_connections.setdefault(channel, set()).add(websocket)
+        
         # Store connection metadata
         self.connection_data[websocket] = {
             "channel": channel,
+            "topics": topics,
             "user_id": user_data.get("user_id"),
             "role": user_data.get("role"),
             "connected_at": asyncio.get_event_loop().time()
@@ -89,11 +133,32 @@ class WebSocketManager:
                 if not self.active_connections[channel]:
                     del self.active_connections[channel]
             
+            # Remove from topic indexes
+            topics = self.connection_data[websocket].get("topics")
+            if topics:
+                for topic in topics:
+                    _discard(self.topic_connections, f"{channel}:{topic}", websocket)
+            else:
+                _discard(self.unfiltered_connections, channel, websocket)
+            
             # Remove connection data
             del self.connection_data[websocket]
             
             logger.info(f"WebSocket disconnected from channel '{channel}' for user {user_id}")
     
+    async def wait_disconnect(self, websocket: WebSocket):
+        """Block until the client disconnects, answering text "ping" heartbeats with pong"""
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                # Older clients still run their own heartbeat and wait for "pong"
+                if message.get("text") == "ping":
+                    await websocket.send_text("pong")
+        finally:
+            self.disconnect(websocket)
+    
     async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket):
         """Send message to specific WebSocket connection"""
         try:
@@ -102,25 +167,41 @@ class WebSocketManager:
             logger.error(f"Failed to send personal message: {e}")
             self.disconnect(websocket)
     
-    async def broadcast_to_channel(self, channel: str, message: Dict[str, Any]):
-        """Broadcast message to all connections in a channel"""
-        await self._broadcast_to_channel(channel, message)
+    async def broadcast_to_channel(
+        self,
+        channel: str,
+        message: Dict[str, Any],
+        topics: Optional[Iterable[str]] = None
+    ):
+        """Broadcast message to a channel; with topics, only to unfiltered and matching subscribers"""
+        await self._broadcast_to_channel(channel, message, topics)
+    
+    def _recipients(self, channel: str, topics: Optional[Iterable[str]]) -> List[WebSocket]:
+        if topics is None:
+            return list(self.active_connections.get(channel, ()))
+        recipients = set(self.unfiltered_connections.get(channel, ()))
+        for topic in topics:
+            recipients.update(self.topic_connections.get(f"{channel}:{topic}", ()))
+        return list(recipients)
     
-    async def _broadcast_to_channel(self, channel: str, message: Dict[str, Any]):
+    async def _broadcast_to_channel(
+        self,
+        channel: str,
+        message: Dict[str, Any],
+        topics: Optional[Iterable[str]] = None
+    ):
         """Internal method to broadcast to channel"""
-        if channel not in self.active_connections:
-            return
-        
-        # Create a copy of connections to avoid modification during iteration
-        connections = list(self.active_connections[channel])
+        # Snapshot of recipients to avoid modification during iteration
+        connections = self._recipients(channel, topics)
         
         if not connections:
             return
         
-        # Send message to all connections
+        # Serialize once; every socket gets the same text frame
+        text = orjson.dumps(message).decode()
         tasks = []
         for connection in connections:
-            tasks.append(self._safe_send(connection, message))
+            tasks.append(self._safe_send(connection, text))
         
         # Execute all sends concurrently
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -130,28 +211,40 @@ class WebSocketManager:
             if isinstance(result, Exception):
                 self.disconnect(connections[i])
     
-    async def _safe_send(self, websocket: WebSocket, message: Dict[str, Any]):
-        """Safely send message to WebSocket with error handling"""
+    async def _safe_send(self, websocket: WebSocket, text: str):
+        """Safely send a pre-serialized message to WebSocket with error handling"""
         try:
-            await websocket.send_text(json.dumps(message))
+            await websocket.send_text(text)
         except Exception as e:
             logger.error(f"Failed to send message to WebSocket: {e}")
             raise e
     
-    async def publish_alert(self, channel: str, alert_data: Dict[str, Any]):
-        """Publish alert to Redis for broadcasting"""
+    async def publish_alert(
+        self,
+        channel: str,
+        alert_data: Dict[str, Any],
+        topics: Optional[Iterable[str]] = None
+    ):
+        """Append alert to the Redis stream for every worker to broadcast (topics: e.g. location_topics(); None = everyone)"""
+        if topics is not None:
+            topics = list(topics)
+        
         if not self.redis_client:
             # Fallback to direct WebSocket broadcast if Redis unavailable
-            await self.broadcast_to_channel(channel, alert_data)
+            await self.broadcast_to_channel(channel, alert_data, topics)
             return
         
         try:
-            redis_channel = f"alerts:{channel}"
-            await self.redis_client.publish(redis_channel, json.dumps(alert_data))
+            await self.redis_client.xadd(
+                ALERT_STREAM,
+                {"channel": channel, "data": orjson.dumps({"topics": topics, "data": alert_data})},
+                maxlen=ALERT_STREAM_MAXLEN,
+                approximate=True
+            )
         except Exception as e:
             logger.error(f"Failed to publish to Redis: {e}")
             # Fallback to direct broadcast
-            await self.broadcast_to_channel(channel, alert_data)
+            await self.broadcast_to_channel(channel, alert_data, topics)
     
     def get_channel_stats(self) -> Dict[str, Any]:
         """Get statistics about active connections"""
@@ -183,10 +276,6 @@ class WebSocketManager:
             except asyncio.CancelledError:
                 pass
         
-        if self.redis_pubsub:
-            await self.redis_pubsub.unsubscribe()
-            await self.redis_pubsub.close()
-        
         if self.redis_client:
             await self.redis_client.close()
 
@@ -195,6 +284,18 @@ class WebSocketManager:
 websocket_manager = WebSocketManager()
 
 
+def zone_topic(zone_id: int) -> str:
+    return f"zone:{zone_id}"
+
+
+async def location_topics(lat: Optional[float], lon: Optional[float]) -> Optional[List[str]]:
+    """Zone topics for an alert at (lat, lon); None (send to everyone) when there is no location"""
+    if lat is None or lon is None:
+        return None
+    result = await check_point(lat, lon)
+    return [zone_topic(zone["id"]) for zone in result["zones"]]
+
+
 async def initialize_websocket_manager():
     """Initialize the WebSocket manager with Redis"""
     await websocket_manager.initialize_redis()
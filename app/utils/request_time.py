@@ -0,0 +1,29 @@
+"""
+Per-request timestamp: read the clock once when a request arrives and reuse it in response bodies
+"""
+from fastapi import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .timezone import now_ist
+
+
+class RequestTimeMiddleware:
+    """Stash the arrival time (IST) as request.state.request_time for HTTP requests"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["request_time"] = now_ist()
+        await self.app(scope, receive, send)
+
+
+def request_timestamp(request: Request) -> str:
+    """Dependency: ISO string of the request's arrival time, formatted at most once per request"""
+    state = request.state
+    ts = getattr(state, "request_ts", None)
+    if ts is None:
+        request_time = getattr(state, "request_time", None) or now_ist()
+        ts = state.request_ts = request_time.isoformat()
+    return ts
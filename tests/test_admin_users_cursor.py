@@ -0,0 +1,69 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.routers.admin import _decode_user_cursor, _encode_user_cursor, _users_page_query
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def _compiled(stmt):
+    return stmt.compile(dialect=asyncpg.dialect())
+
+
+def test_cursor_round_trips_created_at_and_id():
+    created_at = datetime(2026, 10, 16, 12, 30, 15, 123456, tzinfo=IST)
+    user_id = str(uuid.uuid4())
+    
+    cursor = _encode_user_cursor(created_at, user_id)
+    
+    # base64url without padding: nothing that needs escaping in a query string
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+    assert _decode_user_cursor(cursor) == (created_at, user_id)
+
+
+def test_cursor_id_is_canonicalised():
+    created_at = datetime(2026, 10, 16, 12, 0, tzinfo=IST)
+    user_id = uuid.uuid4()
+    
+    cursor = _encode_user_cursor(created_at, str(user_id).upper())
+    
+    assert _decode_user_cursor(cursor)[1] == str(user_id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "@@@",                                  # not base64
+    "bm90anNvbg",                           # "notjson"
+    "e30",                                  # {}
+    "WzEsMl0",                              # [1,2]
+    _encode_user_cursor(datetime(2026, 10, 16, tzinfo=IST), "not-a-uuid"),
+])
+def test_malformed_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        _decode_user_cursor(cursor)
+    
+    assert exc_info.value.status_code == 400
+
+
+def test_page_orders_and_seeks_on_the_uuid_id():
+    created_at = datetime(2026, 10, 16, 12, 0, tzinfo=IST)
+    user_id = str(uuid.uuid4())
+    
+    compiled = _compiled(_users_page_query(None, 50, _encode_user_cursor(created_at, user_id)))
+    sql = str(compiled)
+    
+    assert "ORDER BY users_unified.created_at DESC, users_unified.id DESC" in sql
+    # The row comparison is typed as (timestamptz, uuid), not text
+    assert "(users_unified.created_at, users_unified.id) < ($1::TIMESTAMP WITH TIME ZONE, $2::UUID)" in sql
+    assert compiled.params["after_created"] == created_at
+    assert compiled.params["after_id"] == user_id
+
+
+def test_first_page_has_no_seek():
+    sql = str(_compiled(_users_page_query("tourist", 50, None)))
+    
+    assert "users_unified.kind = $1" in sql
+    assert "<" not in sql
@@ -0,0 +1,37 @@
+import pytest
+
+from app.routers.ai import _classify, _classify_score, _risk_level
+
+
+@pytest.mark.parametrize("score, expected", [
+    (0.0, "low"),
+    (0.4, "low"),        # thresholds are strict: 0.4 still maps down
+    (0.41, "medium"),
+    (0.7, "medium"),     # ... and so does 0.7
+    (0.71, "high"),
+    (1.0, "high"),
+])
+def test_risk_level_thresholds_map_down(score, expected):
+    assert _risk_level(score) == expected
+
+
+@pytest.mark.parametrize("score", [-5, 0, 0.5, 19.99, 20, 39.5, 40, 59.99, 60, 79, 80, 99.9, 100, 150])
+def test_classify_table_matches_the_score_ladder(score):
+    assert _classify("unknown", score) == _classify_score(score)
+
+
+@pytest.mark.parametrize("alert_type, expected", [
+    ("sos", ("critical", 1.0)),
+    ("panic", ("high", 0.95)),
+])
+def test_classify_alert_type_overrides_score(alert_type, expected):
+    assert _classify(alert_type, 95) == expected
+
+
+@pytest.mark.parametrize("score, expected", [
+    (float("nan"), ("low", 0.65)),
+    (float("inf"), ("low", 0.65)),
+    (float("-inf"), ("critical", 0.9)),
+])
+def test_classify_non_finite_scores(score, expected):
+    assert _classify("unknown", score) == expected
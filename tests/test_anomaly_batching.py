@@ -0,0 +1,103 @@
+import asyncio
+import math
+
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from app.services.anomaly import AnomalyDetector, POINT_BATCH_MAX, _fill_point_features
+
+
+def _fitted_detector(monkeypatch) -> AnomalyDetector:
+    rng = np.random.default_rng(0)
+    train = rng.normal(size=(200, 7))
+    detector = AnomalyDetector()
+    detector.scaler = StandardScaler().fit(train)
+    detector.isolation_forest = IsolationForest(n_estimators=20, random_state=0).fit(
+        detector.scaler.transform(train)
+    )
+    # In-memory models only; never stat or load the models directory
+    monkeypatch.setattr(detector, "_refresh_models", lambda: None)
+    return detector
+
+
+def _points(n: int) -> list:
+    return [
+        {
+            "latitude": 28.6 + i * 0.001,
+            "longitude": 77.2 - i * 0.001,
+            "speed": float(i % 30),
+            "timestamp": f"2026-10-16T{i % 24:02d}:00:00+05:30",
+        }
+        for i in range(n)
+    ]
+
+
+def _sequential_scores(detector: AnomalyDetector, points: list) -> np.ndarray:
+    rows = np.empty((len(points), len(detector.feature_columns)), dtype=np.float64)
+    for row, point in zip(rows, points):
+        _fill_point_features(row, point)
+    return detector._score_rows(rows)
+
+
+async def _score_all(detector: AnomalyDetector, points: list, **gather_kwargs) -> list:
+    return await asyncio.gather(*(detector.score_point(p) for p in points), **gather_kwargs)
+
+
+def test_concurrent_points_match_sequential_scores(monkeypatch):
+    detector = _fitted_detector(monkeypatch)
+    points = _points(2 * POINT_BATCH_MAX + 7)
+    expected = _sequential_scores(detector, points)
+    
+    batch_sizes = []
+    score_rows = detector._score_rows
+    
+    def recording_score_rows(rows):
+        batch_sizes.append(len(rows))
+        return score_rows(rows)
+    
+    monkeypatch.setattr(detector, "_score_rows", recording_score_rows)
+    scores = asyncio.run(_score_all(detector, points))
+    
+    # Each caller gets its own row's score back, in order
+    np.testing.assert_allclose(scores, expected)
+    # All rows were queued before the batcher ran, so they share full batches
+    assert sum(batch_sizes) == len(points)
+    assert len(batch_sizes) == math.ceil(len(points) / POINT_BATCH_MAX)
+    assert max(batch_sizes) == POINT_BATCH_MAX
+
+
+def test_lone_point_is_scored_in_its_own_batch(monkeypatch):
+    detector = _fitted_detector(monkeypatch)
+    point = _points(1)
+    
+    scores = asyncio.run(_score_all(detector, point))
+    
+    np.testing.assert_allclose(scores, _sequential_scores(detector, point))
+
+
+def test_batch_failure_reaches_every_waiting_caller(monkeypatch):
+    detector = _fitted_detector(monkeypatch)
+    points = _points(10)
+    
+    def failing_score_rows(rows):
+        raise RuntimeError("model exploded")
+    
+    score_rows = detector._score_rows
+    
+    async def fail_then_recover():
+        monkeypatch.setattr(detector, "_score_rows", failing_score_rows)
+        failed = await _score_all(detector, points, return_exceptions=True)
+        # The batcher keeps running after a failed batch
+        monkeypatch.setattr(detector, "_score_rows", score_rows)
+        recovered = await detector.score_point(points[0])
+        return failed, recovered
+    
+    failed, recovered = asyncio.run(fail_then_recover())
+    
+    assert len(failed) == len(points)
+    for result in failed:
+        assert isinstance(result, RuntimeError)
+        assert str(result) == "model exploded"
+    assert recovered == pytest.approx(_sequential_scores(detector, points[:1])[0])
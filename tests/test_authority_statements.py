@@ -0,0 +1,25 @@
+from sqlalchemy.dialects import postgresql
+
+from app.routers.authority import _CLOSE_INCIDENT
+
+
+def _compiled_sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_close_incident_ctes_render_in_dependency_order():
+    sql = _compiled_sql(_CLOSE_INCIDENT)
+    
+    # resolved_alert joins closed_incident, so closed_incident must be defined first
+    closed = sql.index("closed_incident AS")
+    resolved = sql.index("resolved_alert AS")
+    assert sql.startswith("WITH closed_incident AS")
+    assert closed < resolved
+    assert "FROM closed_incident WHERE alerts.id = closed_incident.alert_id" in sql[resolved:]
+
+
+def test_close_incident_returns_incident_number():
+    sql = _compiled_sql(_CLOSE_INCIDENT)
+    
+    assert sql.rstrip().endswith("FROM closed_incident")
+    assert "SELECT closed_incident.incident_number" in sql
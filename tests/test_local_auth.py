@@ -0,0 +1,85 @@
+import time
+import uuid
+
+import pytest
+
+from app.auth import local_auth as local_auth_module
+from app.auth.local_auth import LocalAuthService, _TOKEN_CACHE, _TOKEN_CACHE_TTL, _token_ttu, _uuid7
+
+
+@pytest.fixture
+def jwt_decodes(monkeypatch):
+    """Tokens passed to a real jwt.decode, over an empty token cache"""
+    _TOKEN_CACHE.clear()
+    decodes = []
+    decode = local_auth_module.jwt.decode
+    
+    def counting_decode(token, *args, **kwargs):
+        decodes.append(token)
+        return decode(token, *args, **kwargs)
+    
+    monkeypatch.setattr(local_auth_module.jwt, "decode", counting_decode)
+    yield decodes
+    _TOKEN_CACHE.clear()
+
+
+def test_uuid7_is_a_canonical_version_7_uuid():
+    value = _uuid7()
+    parsed = uuid.UUID(value)
+    
+    assert value == str(parsed)
+    assert parsed.version == 7
+    assert parsed.variant == uuid.RFC_4122
+
+
+def test_uuid7_leads_with_the_unix_millisecond_timestamp():
+    before = time.time_ns() // 1_000_000
+    value = uuid.UUID(_uuid7())
+    after = time.time_ns() // 1_000_000
+    
+    assert before <= value.int >> 80 <= after
+
+
+def test_uuid7_sorts_by_creation_time():
+    ids = []
+    for _ in range(5):
+        ids.append(_uuid7())
+        time.sleep(0.002)  # ids within one millisecond are only ordered by their random bits
+    
+    assert ids == sorted(ids)
+    assert [uuid.UUID(i) for i in ids] == sorted(uuid.UUID(i) for i in ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_repeated_token_is_decoded_once(jwt_decodes):
+    service = LocalAuthService()
+    token = service.create_access_token({"sub": "u1", "role": "tourist"})
+    
+    first = service.verify_token(token)
+    second = service.verify_token(token)
+    
+    assert first == second == {"sub": "u1", "role": "tourist"}
+    assert jwt_decodes == [token]
+
+
+@pytest.mark.parametrize("payload, expected_ttl", [
+    ({"sub": "u1"}, _TOKEN_CACHE_TTL),                          # no exp: capped TTL
+    ({"sub": "u1", "exp": 1_000 + 10}, 10),                     # expires first
+    ({"sub": "u1", "exp": 1_000 + 10 * _TOKEN_CACHE_TTL}, _TOKEN_CACHE_TTL),
+])
+def test_cache_entry_never_outlives_token(payload, expected_ttl):
+    assert _token_ttu(b"key", payload, 1_000) == 1_000 + expected_ttl
+
+
+def test_cached_payload_past_exp_is_decoded_again(jwt_decodes, monkeypatch):
+    service = LocalAuthService()
+    exp = int(time.time()) + 60
+    token = service.create_access_token({"sub": "u1", "exp": exp})
+    service.verify_token(token)
+    
+    # verify_token's clock passes exp while the cache's own timer still holds
+    # the entry; the stale payload must not be served (PyJWT keeps its own clock)
+    monkeypatch.setattr(local_auth_module.time, "time", lambda: exp + 1)
+    service.verify_token(token)
+    
+    assert jwt_decodes == [token, token]